@@ -1,13 +1,39 @@
 import streamlit as st
 import importlib
-from servicos.usuarios import carregar_usuarios_da_planilha, login
+from servicos.usuarios import login
+from servicos.planilhas import iniciar_envios_em_segundo_plano, iniciar_revalidacao_em_segundo_plano
+from servicos import fila_envios, metricas
+from servicos.monitor_esaj import iniciar_monitoramento
 
 st.set_page_config(page_title="Sistema Jurídico", layout="wide")
 
+def mostrar_fila_de_envios():
+    """
+    Mostra na barra lateral os cadastros ainda não gravados na planilha.
+    """
+    resumo = fila_envios.resumo()
+    pendentes = resumo.get(fila_envios.PENDENTE, 0) + resumo.get(fila_envios.ENVIANDO, 0)
+    falhas = resumo.get(fila_envios.FALHOU, 0)
+    if pendentes:
+        st.sidebar.info(f"⏳ {pendentes} envio(s) aguardando gravação na planilha")
+    if falhas:
+        st.sidebar.error(f"❌ {falhas} envio(s) não gravado(s) na planilha")
+        with st.sidebar.expander("Ver falhas"):
+            for envio in fila_envios.listar(fila_envios.FALHOU, limite=20):
+                st.write(f"**{envio['tipo']}** ({envio['tentativas']} tentativas): {envio['erro']}")
+            if st.button("Reenviar falhas"):
+                fila_envios.reenviar_falhas()
+                st.rerun()
+
 def main():
-    # Autenticação
-    st.session_state.USERS = carregar_usuarios_da_planilha()
+    # Envia em segundo plano o que ficou pendente na fila local
+    iniciar_envios_em_segundo_plano()
+    # Atualiza as abas em segundo plano (cache expirado não espera pelo GAS)
+    iniciar_revalidacao_em_segundo_plano()
+    # Consulta o ESAJ em segundo plano, prazos mais próximos primeiro (ESAJ_MONITORAMENTO=1)
+    iniciar_monitoramento()
 
+    # Autenticação (o índice de usuários é compartilhado; a sessão guarda só o próprio registro)
     with st.sidebar:
         st.header("🔐 Login")
         usr = st.text_input("Usuário")
@@ -31,21 +57,25 @@ def main():
 
     if "usuario" in st.session_state:
         st.sidebar.success(f"Bem‑vindo, {st.session_state.usuario} ({st.session_state.papel})")
+        mostrar_fila_de_envios()
 
         PAGES = {
             "Dashboard":              "pages.dashboard",
             "Clientes":               "pages.clientes",
             "Processos":              "pages.processos",
+            "Agenda de Prazos":       "pages.agenda",
             "Históricos":             "pages.historicos",
             "Gerenciar Funcionários": "pages.gerenciar_funcionarios",
         }
         if st.session_state.papel == "owner":
             PAGES["Gerenciar Escritórios"] = "pages.gerenciar_escritorios"
             PAGES["Gerenciar Permissões"]  = "pages.gerenciar_permissoes"
+            PAGES["Diagnóstico"]           = "pages.diagnostico"
 
         escolha = st.sidebar.selectbox("Menu", list(PAGES.keys()))
         mod = importlib.import_module(PAGES[escolha])
-        mod.main()
+        with metricas.medir("pagina", pagina=PAGES[escolha]):
+            mod.main()
     else:
         st.info("Por favor, faça login para acessar o sistema.")
 
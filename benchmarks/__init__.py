@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+
+# medições de desempenho (rodar com: python -m benchmarks.<modulo>)
@@ -0,0 +1,114 @@
+# benchmarks/dados_sinteticos.py
+"""
+Gera abas sintéticas (Processo, Cliente, Historico_Peticao, Escritorio e Funcionario)
+no mesmo formato que o GAS devolve, para medir o app com planilhas grandes.
+
+    python -m benchmarks.dados_sinteticos --linhas 10000 --saida dados.json
+"""
+import argparse
+import datetime
+import json
+import random
+
+TAMANHOS = [1_000, 10_000, 100_000, 1_000_000]
+
+AREAS = ["Cível", "Criminal", "Trabalhista", "Previdenciário", "Tributário"]
+CONTRATOS = ["Fixo", "Por Ato", "Contingência"]
+TIPOS_PETICAO = ["Inicial", "Contestação", "Recurso", "Embargos", "Manifestação"]
+PALAVRAS = (
+    "dano moral material indenização contrato rescisão cobrança juros multa sentença "
+    "acórdão recurso apelação agravo tutela urgência liminar prova pericial testemunha "
+    "audiência conciliação honorários custas prescrição decadência mérito pedido réu autor"
+).split()
+
+SENHA_PADRAO = "bench123"
+
+def _data(base, dias):
+    return (base + datetime.timedelta(days=dias)).strftime("%Y-%m-%d")
+
+def gerar_abas(linhas, semente=42, escritorios=8, funcionarios=40):
+    """
+    Devolve {tipo: [linhas]} com `linhas` processos e petições e linhas // 10 clientes.
+    A mesma semente gera sempre os mesmos dados.
+    """
+    rnd = random.Random(semente)
+    hoje = datetime.date.today()
+    inicio = hoje - datetime.timedelta(days=3 * 365)
+
+    nomes_escritorios = [f"Escritório {i:02d}" for i in range(escritorios)]
+    abas = {
+        "Escritorio": [
+            {"nome": nome, "cnpj": f"{i:014d}", "endereco": f"Rua {i}", "telefone": "31 0000-0000",
+             "email": f"contato{i}@escritorio.test", "data_cadastro": _data(inicio, i),
+             "area_atuacao": ", ".join(AREAS)}
+            for i, nome in enumerate(nomes_escritorios)
+        ],
+        "Funcionario": [
+            {"nome": "Dono", "usuario": "dono", "senha": SENHA_PADRAO, "papel": "owner",
+             "escritorio": "Global", "area": "Todas", "data_cadastro": _data(inicio, 0)}
+        ] + [
+            {"nome": f"Funcionário {i:03d}", "usuario": f"func{i:03d}", "senha": SENHA_PADRAO,
+             "papel": rnd.choice(["manager", "lawyer", "assistant"]),
+             "escritorio": nomes_escritorios[i % escritorios], "area": rnd.choice(AREAS),
+             "email": f"func{i:03d}@escritorio.test", "telefone": "31 9000-0000",
+             "data_cadastro": _data(inicio, i)}
+            for i in range(funcionarios)
+        ],
+    }
+    responsaveis = [f["usuario"] for f in abas["Funcionario"]]
+
+    n_clientes = max(1, linhas // 10)
+    abas["Cliente"] = [
+        {"nome": f"Cliente {i:07d}", "email": f"cliente{i:07d}@cliente.test",
+         "telefone": f"31 9{i % 10_000:04d}-{i % 9_999:04d}", "aniversario": _data(inicio, -rnd.randrange(20_000)),
+         "endereco": f"Rua {rnd.choice(PALAVRAS).title()}, {i % 999 + 1}", "observacoes": "",
+         "cadastro": f"{_data(inicio, i * 1095 // n_clientes)} 10:00:00",
+         "responsavel": rnd.choice(responsaveis), "escritorio": rnd.choice(nomes_escritorios)}
+        for i in range(n_clientes)
+    ]
+
+    processos = []
+    for i in range(linhas):
+        cadastro = i * 1095 // linhas
+        processos.append({
+            "numero": f"{i:07d}-{rnd.randrange(100):02d}.2024.8.13.{rnd.randrange(10_000):04d}",
+            "cliente": f"Cliente {rnd.randrange(n_clientes):07d}",
+            "contrato": rnd.choice(CONTRATOS),
+            "descricao": " ".join(rnd.choices(PALAVRAS, k=8)),
+            "valor_total": round(rnd.uniform(1_000, 500_000), 2),
+            "valor_movimentado": round(rnd.uniform(0, 50_000), 2),
+            "prazo_inicial": _data(inicio, cadastro),
+            "prazo": _data(hoje, rnd.randint(-30, 90)),
+            "houve_movimentacao": rnd.random() < 0.1,
+            "encerrado": rnd.random() < 0.15,
+            "responsavel": rnd.choice(responsaveis),
+            "area": rnd.choice(AREAS),
+            "escritorio": rnd.choice(nomes_escritorios),
+            "link_material": "",
+            "data_cadastro": f"{_data(inicio, cadastro)} 09:00:00",
+        })
+    abas["Processo"] = processos
+
+    abas["Historico_Peticao"] = [
+        {"numero": processos[rnd.randrange(linhas)]["numero"],
+         "tipo": rnd.choice(TIPOS_PETICAO),
+         "data": f"{_data(inicio, i * 1095 // linhas)} {i % 24:02d}:{i % 60:02d}:00",
+         "cliente_associado": f"Cliente {rnd.randrange(n_clientes):07d}",
+         "responsavel": rnd.choice(responsaveis),
+         "escritorio": rnd.choice(nomes_escritorios),
+         "conteudo": " ".join(rnd.choices(PALAVRAS, k=60))}
+        for i in range(linhas)
+    ]
+    return abas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=TAMANHOS[0])
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", required=True)
+    args = parser.parse_args()
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(gerar_abas(args.linhas, args.semente), f, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
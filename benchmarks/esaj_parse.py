@@ -0,0 +1,52 @@
+# benchmarks/esaj_parse.py
+"""
+Compara o parse das páginas do ESAJ salvas em benchmarks/fixtures/esaj:
+árvore completa com html.parser (implementação original) x parse filtrado atual.
+
+    python -m benchmarks.esaj_parse [--repeticoes 20]
+"""
+import argparse
+import pathlib
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+from servicos.esaj import _extrair_movimentacoes, PARSER_HTML
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures" / "esaj"
+
+def extrair_original(html):
+    soup = BeautifulSoup(html, "html.parser")
+    andamentos = soup.find_all("tr", class_="fundocinza1")
+    return [a.get_text(strip=True) for a in andamentos[:5]]
+
+def medir(funcao, html, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(html)
+    tempo_ms = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    tracemalloc.start()
+    funcao(html)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo_ms, pico / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"parser atual: {PARSER_HTML}")
+    print(f"{'página':<24}{'KB':>8}{'original ms':>14}{'atual ms':>12}{'orig. pico KB':>16}{'atual pico KB':>16}")
+    for caminho in sorted(FIXTURES.glob("*.html")):
+        html = caminho.read_text(encoding="utf-8")
+        esperado = extrair_original(html)
+        obtido = _extrair_movimentacoes(html)
+        if obtido != esperado:
+            raise SystemExit(f"{caminho.name}: saída diferente da implementação original\n{esperado}\n{obtido}")
+        t_orig, m_orig = medir(extrair_original, html, args.repeticoes)
+        t_novo, m_novo = medir(_extrair_movimentacoes, html, args.repeticoes)
+        print(f"{caminho.name:<24}{len(html) / 1024:>8.0f}{t_orig:>14.1f}{t_novo:>12.1f}{m_orig:>16.0f}{m_novo:>16.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/gas_local.py
+"""
+Servidor HTTP local que imita o contrato do web app do Google Apps Script:
+GET ?tipo=... (com desde, offset/limit, ordenar/ordem e filtros opcionais) e
+POST JSON respondendo "OK", inclusive {"tipo": "Lote", "itens": [...]}.
+
+    python -m benchmarks.gas_local --linhas 10000 [--porta 8765] [--atraso 0.3]
+
+Depois aponte o app para ele: GAS_WEB_APP_URL=http://127.0.0.1:8765/ streamlit run app.py
+(login: dono / senha de benchmarks.dados_sinteticos.SENHA_PADRAO).
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from servicos.replica import MARCA_POR_ABA, MARCA_PADRAO
+from .dados_sinteticos import gerar_abas
+
+class ServidorGAS:
+    """
+    Mantém as abas em memória e atende o app numa thread. Use como context manager:
+
+        with ServidorGAS(gerar_abas(1000)) as gas:
+            os.environ["GAS_WEB_APP_URL"] = gas.url
+    """
+    def __init__(self, abas, porta=0, atraso=0.0):
+        self.abas = abas
+        self.atraso = atraso
+        self.requisicoes = 0
+        self.bytes_enviados = 0
+        self._lock = threading.Lock()
+        self._json_abas = {}  # corpo pronto das respostas sem parâmetros, por aba
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self._httpd.server_address[:2]
+        return f"http://{host}:{porta}/"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def responder_get(self, consulta):
+        tipo = consulta.get("tipo", "")
+        linhas = self.abas.get(tipo, [])
+        desde = consulta.get("desde")
+        if "offset" not in consulta and not desde:
+            with self._lock:
+                if tipo not in self._json_abas:
+                    self._json_abas[tipo] = json.dumps(linhas, ensure_ascii=False).encode("utf-8")
+                return self._json_abas[tipo]
+
+        if desde:
+            marca = MARCA_POR_ABA.get(tipo, MARCA_PADRAO)
+            linhas = [l for l in linhas if str(l.get(marca, "")) >= desde]
+        if "offset" not in consulta:
+            return json.dumps(linhas, ensure_ascii=False).encode("utf-8")
+
+        for campo, valor in json.loads(consulta.get("filtros", "{}")).items():
+            valores = {str(v) for v in (valor if isinstance(valor, list) else [valor])}
+            linhas = [l for l in linhas if str(l.get(campo, "")) in valores]
+        if consulta.get("ordenar"):
+            campo = consulta["ordenar"]
+            linhas = sorted(linhas, key=lambda l: str(l.get(campo, "")), reverse=consulta.get("ordem") == "desc")
+        offset = int(consulta["offset"])
+        fim = offset + int(consulta["limit"]) if "limit" in consulta else None
+        return json.dumps({"linhas": linhas[offset:fim], "total": len(linhas)}, ensure_ascii=False).encode("utf-8")
+
+    def responder_post(self, payload):
+        itens = payload["itens"] if payload.get("tipo") == "Lote" else [payload]
+        with self._lock:
+            for item in itens:
+                item = dict(item)
+                tipo = item.pop("tipo", "")
+                aba = self.abas.setdefault(tipo, [])
+                if item.pop("atualizar", False):
+                    for linha in aba:
+                        if linha.get("nome") == item.get("nome"):
+                            linha.update(item)
+                else:
+                    aba.append(item)
+                self._json_abas.pop(tipo, None)
+        return b"OK"
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, corpo, tipo_conteudo):
+                if servidor.atraso:
+                    time.sleep(servidor.atraso)
+                self.send_response(200)
+                self.send_header("Content-Type", tipo_conteudo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+                with servidor._lock:
+                    servidor.requisicoes += 1
+                    servidor.bytes_enviados += len(corpo)
+
+            def do_GET(self):
+                consulta = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                self._responder(servidor.responder_get(consulta), "application/json")
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(tamanho) or b"{}")
+                self._responder(servidor.responder_post(payload), "text/plain")
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--atraso", type=float, default=0.0, help="segundos de espera por resposta (latência do GAS)")
+    args = parser.parse_args()
+    with ServidorGAS(gerar_abas(args.linhas), args.porta, args.atraso) as gas:
+        print(f"GAS local em {gas.url} ({args.linhas} linhas por aba)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/importtime.py
+"""
+Mede o tempo de import do app e de cada página com `python -X importtime`
+e falha (código 1) se algum passar do orçamento ou importar uma biblioteca pesada
+que não deveria (PESADAS fora de PESADAS_PERMITIDAS).
+
+    python -m benchmarks.importtime [--repeticoes 3] [--orcamento-app-ms 900] [--orcamento-pagina-ms 750] [--detalhes 8]
+
+O app é medido num interpretador novo (cold start do worker); cada página é medida
+depois de `import app`, ou seja, só o custo extra do primeiro render dela.
+Os orçamentos padrão são o medido hoje (app ~700-800 ms, páginas com pandas até
+~650 ms) com uma folga de ~15% para o ruído da máquina.
+"""
+import argparse
+import os
+import pathlib
+import pkgutil
+import subprocess
+import sys
+
+RAIZ = pathlib.Path(__file__).resolve().parent.parent
+
+# Todas as páginas do pacote pages/ (novas páginas entram sem editar este arquivo)
+PAGINAS = sorted(f"pages.{m.name}" for m in pkgutil.iter_modules([str(RAIZ / "pages")]))
+
+# Bibliotecas importadas só no primeiro uso (ver utils/helpers.py)
+PESADAS = ("pandas", "numpy", "pyarrow", "openpyxl", "fpdf", "docx")
+# Quem pode importá-las já no import: as páginas que renderizam a partir do armazém
+# (DataFrames). O app e as demais páginas não podem importar nenhuma
+_PANDAS = ("pandas", "numpy", "pyarrow")
+PESADAS_PERMITIDAS = {
+    "pages.agenda": _PANDAS,
+    "pages.dashboard": _PANDAS,
+    "pages.historicos": _PANDAS,
+    "pages.processos": _PANDAS,
+}
+
+def medir_import(modulo, preimportar=None):
+    """
+    Importa `modulo` num processo novo com -X importtime e devolve
+    (cumulativo do módulo em ms, [(cumulativo ms, nome)] dos imports de primeiro nível,
+    conjunto das PESADAS importadas).
+    """
+    codigo = f"import {preimportar}; " if preimportar else ""
+    codigo += f"import sys; sys.stderr.write('#marca\\n'); import {modulo}"
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"falha ao importar {modulo}:\n{proc.stderr[-2000:]}")
+
+    linhas = proc.stderr.split("#marca\n", 1)[-1].splitlines()
+    total_ms = 0.0
+    primeiro_nivel = []
+    pesadas = set()
+    for linha in linhas:
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = linha.split("|")
+        try:
+            cumulativo_ms = int(cumulativo) / 1000
+        except ValueError:
+            continue  # cabeçalho
+        nome_limpo = nome.strip()
+        if nome_limpo in PESADAS:
+            pesadas.add(nome_limpo)
+        if nome_limpo == modulo:
+            total_ms = cumulativo_ms
+        # Indentação de dois espaços = importado diretamente pelo módulo medido
+        elif nome.startswith("   ") and not nome.startswith("    "):
+            primeiro_nivel.append((cumulativo_ms, nome_limpo))
+    return total_ms, sorted(primeiro_nivel, reverse=True), pesadas
+
+def melhor_de(repeticoes, modulo, preimportar=None):
+    # O menor tempo é o menos afetado por ruído do sistema
+    return min((medir_import(modulo, preimportar) for _ in range(repeticoes)), key=lambda r: r[0])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--orcamento-app-ms", type=float,
+                        default=float(os.getenv("IMPORTTIME_ORCAMENTO_APP_MS", "900")))
+    parser.add_argument("--orcamento-pagina-ms", type=float,
+                        default=float(os.getenv("IMPORTTIME_ORCAMENTO_PAGINA_MS", "750")))
+    parser.add_argument("--detalhes", type=int, default=8, help="imports mais caros mostrados por módulo")
+    args = parser.parse_args()
+
+    alvos = [("app", None, args.orcamento_app_ms)] + [(p, "app", args.orcamento_pagina_ms) for p in PAGINAS]
+    estourados = []
+    for modulo, preimportar, orcamento in alvos:
+        total_ms, detalhes, pesadas = melhor_de(args.repeticoes, modulo, preimportar)
+        indevidas = sorted(pesadas.difference(PESADAS_PERMITIDAS.get(modulo, ())))
+        problemas = []
+        if total_ms > orcamento:
+            problemas.append("ESTOUROU")
+        if indevidas:
+            problemas.append(f"IMPORTA {', '.join(indevidas)}")
+        situacao = "  ".join(problemas) or "ok"
+        print(f"{modulo:<34}{total_ms:>10.1f} ms  (orçamento {orcamento:.0f} ms)  {situacao}")
+        for cumulativo_ms, nome in detalhes[:args.detalhes]:
+            print(f"    {nome:<30}{cumulativo_ms:>10.1f} ms")
+        if problemas:
+            estourados.append(modulo)
+
+    if estourados:
+        print(f"\nAcima do orçamento ou com imports pesados indevidos: {', '.join(estourados)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# benchmarks/paginas.py
+"""
+Roda cada página (main()) sem navegador, via Streamlit AppTest, contra o GAS local
+com abas sintéticas, e mede carga, filtros, cálculo de status e exportação.
+
+    python -m benchmarks.paginas [--tamanhos 1000,10000] [--paginas dashboard,processos] [--atraso 0] [--json saida.json]
+
+Cada tamanho roda num processo novo, com réplica local vazia (cold start real).
+Tempos em ms; "pico" é o pico de memória alocada pelo Python (tracemalloc) em MB.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PAGINAS = {
+    "dashboard":              "pages.dashboard",
+    "clientes":               "pages.clientes",
+    "processos":              "pages.processos",
+    "agenda":                 "pages.agenda",
+    "historicos":             "pages.historicos",
+    "gerenciar_funcionarios": "pages.gerenciar_funcionarios",
+    "gerenciar_escritorios":  "pages.gerenciar_escritorios",
+    "gerenciar_permissoes":   "pages.gerenciar_permissoes",
+}
+ABAS_SINCRONIZADAS = ["Processo", "Cliente", "Historico_Peticao", "Funcionario", "Escritorio"]
+FORMATOS = ["txt", "csv", "xlsx", "parquet"]
+TIMEOUT_APPTEST = 1800
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+def _pico_memoria(funcao):
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def _limpar_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+def _nova_sessao(modulo):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_string(
+        f"import importlib\nimportlib.import_module({modulo!r}).main()\n",
+        default_timeout=TIMEOUT_APPTEST,
+    )
+    at.session_state["usuario"] = "dono"
+    at.session_state["papel"] = "owner"
+    at.session_state["dados_usuario"] = {"username": "dono", "papel": "owner", "escritorio": "Global", "area": "Todas"}
+    return at
+
+def _escolher(at, rotulo, valor):
+    # Serve tanto para selectbox quanto para multiselect
+    for widget in at.selectbox:
+        if widget.label == rotulo:
+            widget.set_value(valor)
+            return True
+    for widget in at.multiselect:
+        if widget.label == rotulo:
+            widget.set_value([valor])
+            return True
+    return False
+
+def _digitar(at, rotulo, valor):
+    for widget in at.text_input:
+        if widget.label == rotulo:
+            widget.input(valor)
+            return True
+    return False
+
+def _filtrar(nome, at):
+    """
+    Aplica na sessão já renderizada a interação típica da página e devolve
+    a descrição do que foi feito (ou None se a página não tem filtro).
+    """
+    if nome == "dashboard":
+        if _escolher(at, "Área", "Cível") and _escolher(at, "Status", "🔴 Atrasado"):
+            return "área + status"
+        return None
+    if nome == "agenda":
+        if _escolher(at, "Responsável", "Todos"):
+            at.slider[0].set_value(30)
+            return "todos + 30 dias"
+        return None
+    if nome == "historicos":
+        _digitar(at, "Buscar no conteúdo das petições (tipo, cliente ou texto)", "dano moral recurso")
+        return "busca no texto"
+    chaves = {"clientes": "clientes", "processos": "processos", "gerenciar_funcionarios": "funcionarios"}
+    if nome in chaves:
+        # tabela_paginada ajusta para a última página existente
+        at.session_state[f"{chaves[nome]}_pagina"] = 10**9
+        return "última página"
+    return None
+
+def medir_pagina(nome, modulo):
+    _limpar_caches()
+    at = _nova_sessao(modulo)
+    fria_ms, _ = _cronometrar(at.run)
+    erros = [e.value for e in at.exception]
+    quente_ms, _ = _cronometrar(at.run)
+
+    filtro_ms = None
+    filtro = _filtrar(nome, at)
+    if filtro:
+        filtro_ms, _ = _cronometrar(at.run)
+        erros += [e.value for e in at.exception]
+
+    _limpar_caches()
+    pico = _pico_memoria(_nova_sessao(modulo).run)
+    return {
+        "fria_ms": fria_ms, "quente_ms": quente_ms, "filtro": filtro,
+        "filtro_ms": filtro_ms, "pico_mb": pico, "erros": erros[:3],
+    }
+
+def medir_tamanho(linhas, paginas, atraso):
+    """
+    Executa todas as medições para um tamanho; precisa rodar num processo novo,
+    pois GAS_WEB_APP_URL e DADOS_LOCAIS_DIR são lidos no import dos serviços.
+    """
+    from benchmarks.dados_sinteticos import gerar_abas
+    geracao_ms, abas = _cronometrar(lambda: gerar_abas(linhas))
+
+    with tempfile.TemporaryDirectory() as dados_locais:
+        os.environ["DADOS_LOCAIS_DIR"] = dados_locais
+        from benchmarks.gas_local import ServidorGAS
+        with ServidorGAS(abas, atraso=atraso) as gas:
+            os.environ["GAS_WEB_APP_URL"] = gas.url
+            from servicos.planilhas import carregar_dados_da_planilha
+            from servicos.armazem import obter_armazem
+            from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+            from utils.helpers import calcular_status_processos
+            from utils.componentes import gerador_exportacao
+
+            resultado = {"linhas": linhas, "geracao_ms": geracao_ms, "sincronizacao_ms": {}, "exportacao": {}}
+            for tipo in ABAS_SINCRONIZADAS:
+                resultado["sincronizacao_ms"][tipo], _ = _cronometrar(lambda: carregar_dados_da_planilha(tipo))
+            resultado["bytes_recebidos"] = gas.bytes_enviados
+
+            processos = carregar_dados_da_planilha("Processo")
+            resultado["status_ms"], _ = _cronometrar(lambda: calcular_status_processos(
+                [p.get("prazo") for p in processos],
+                [p.get("houve_movimentacao") for p in processos],
+                [p.get("encerrado") for p in processos],
+            ))
+            del processos
+
+            # Mesmo caminho do clique num botão de download: o `data` adiado dos botões,
+            # convertido pelo Streamlit (que recusa tipos não suportados)
+            df = obter_armazem().processos
+            for formato in FORMATOS:
+                data = gerador_exportacao(df, "processos", formato)
+                gerar = lambda: len(convert_data_to_bytes_and_infer_mime(data(), ValueError(formato))[0])
+                tempo_ms, tamanho = _cronometrar(gerar)
+                resultado["exportacao"][formato] = {
+                    "ms": tempo_ms, "kb": tamanho / 1024, "pico_mb": _pico_memoria(gerar),
+                }
+            del df
+
+            resultado["paginas"] = {nome: medir_pagina(nome, PAGINAS[nome]) for nome in paginas}
+            resultado["requisicoes_gas"] = gas.requisicoes
+
+    import resource
+    resultado["rss_max_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return resultado
+
+def _imprimir(r):
+    print(f"\n== {r['linhas']:,} linhas por aba ==".replace(",", "."))
+    print(f"geração {r['geracao_ms']:.0f} ms · {r['requisicoes_gas']} requisições ao GAS · "
+          f"{r['bytes_recebidos'] / 2**20:.1f} MB na sincronização · RSS máx. {r['rss_max_mb']:.0f} MB")
+    print("sincronização: " + ", ".join(f"{t} {ms:.0f} ms" for t, ms in r["sincronizacao_ms"].items()))
+    print(f"status (vetorizado): {r['status_ms']:.1f} ms")
+    print("exportação: " + ", ".join(
+        f"{f} {e['ms']:.0f} ms/{e['kb']:.0f} KB/pico {e['pico_mb']:.1f} MB" for f, e in r["exportacao"].items()
+    ))
+    print(f"{'página':<24}{'fria ms':>10}{'quente ms':>11}{'filtro ms':>11}{'pico MB':>9}  filtro")
+    for nome, p in r["paginas"].items():
+        filtro_ms = f"{p['filtro_ms']:.0f}" if p["filtro_ms"] is not None else "-"
+        print(f"{nome:<24}{p['fria_ms']:>10.0f}{p['quente_ms']:>11.0f}{filtro_ms:>11}{p['pico_mb']:>9.1f}  {p['filtro'] or ''}")
+        for erro in p["erros"]:
+            print(f"    erro: {erro}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", default="1000,10000",
+                        help="linhas por aba, separadas por vírgula (ex.: 1000,10000,100000,1000000)")
+    parser.add_argument("--paginas", default=",".join(PAGINAS))
+    parser.add_argument("--atraso", type=float, default=0.0, help="latência simulada do GAS, em segundos")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--interno", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    paginas = [p for p in args.paginas.split(",") if p]
+
+    if args.interno:
+        json.dump(medir_tamanho(args.interno, paginas, args.atraso), sys.stdout)
+        return
+
+    resultados = []
+    for tamanho in (int(t) for t in args.tamanhos.split(",")):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.paginas", "--interno", str(tamanho),
+             "--paginas", ",".join(paginas), "--atraso", str(args.atraso)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"falha com {tamanho} linhas:\n{proc.stderr[-3000:]}")
+        resultados.append(json.loads(proc.stdout))
+        _imprimir(resultados[-1])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
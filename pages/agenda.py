@@ -0,0 +1,70 @@
+import streamlit as st
+import datetime
+from servicos.indice_prazos import obter_indice_prazos
+
+COLUNAS_AGENDA = ["prazo", "numero", "cliente", "area", "responsavel", "escritorio"]
+
+
+def _tabela(processos, vazio):
+    if processos:
+        st.dataframe([{c: p.get(c, "") for c in COLUNAS_AGENDA} for p in processos])
+    else:
+        st.caption(vazio)
+
+
+def main():
+    st.subheader("🗓️ Agenda de Prazos")
+
+    # Índice de prazos (listas ordenadas, atualizadas só com o que mudou)
+    indice = obter_indice_prazos()
+    hoje = datetime.date.today()
+
+    # Por padrão cada um vê a própria agenda
+    usuario = st.session_state.get("usuario")
+    responsaveis = indice.responsaveis()
+    opcoes_responsavel = ["Todos"] + responsaveis
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        filtro_responsavel = st.selectbox(
+            "Responsável", opcoes_responsavel,
+            index=opcoes_responsavel.index(usuario) if usuario in responsaveis else 0
+        )
+    with col2:
+        filtro_escritorio = st.selectbox("Escritório", ["Todos"] + indice.escritorios())
+    with col3:
+        dias = st.slider("Próximos dias", min_value=1, max_value=60, value=7)
+    responsavel = None if filtro_responsavel == "Todos" else filtro_responsavel
+    escritorio = None if filtro_escritorio == "Todos" else filtro_escritorio
+
+    atrasados = indice.atrasados(hoje, responsavel, escritorio)
+    proximos = indice.vencendo(dias, hoje, responsavel, escritorio)
+    vencem_hoje = [p for p in proximos if str(p.get("prazo", ""))[:10] == hoje.isoformat()]
+
+    # Resumo do dia
+    st.markdown(f"#### Resumo de {hoje.strftime('%d/%m/%Y')}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Atrasados", len(atrasados))
+    col2.metric("Vencem hoje", len(vencem_hoje))
+    col3.metric(f"Próximos {dias} dias", len(proximos))
+
+    st.markdown("#### 🔴 Atrasados")
+    _tabela(atrasados, "Nenhum prazo atrasado.")
+    st.markdown(f"#### 🟡 Vencem até {(hoje + datetime.timedelta(days=dias)).strftime('%d/%m/%Y')}")
+    _tabela(proximos, "Nenhum prazo no período.")
+
+    # Visão por advogado (contagens por busca binária em cada agenda)
+    if responsavel is None:
+        st.markdown("#### 👩‍⚖️ Por responsável")
+        resumo = indice.resumo_por_responsavel(dias, hoje)
+        linhas = [
+            {"responsavel": r, "atrasados": a, f"próximos {dias} dias": v}
+            for r, (a, v) in sorted(resumo.items(), key=lambda item: (-item[1][0], -item[1][1]))
+        ]
+        if linhas:
+            st.dataframe(linhas)
+        else:
+            st.caption("Nenhum prazo em aberto.")
+
+
+if __name__ == "__main__":
+    main()
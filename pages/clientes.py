@@ -1,18 +1,14 @@
 import streamlit as st
 import datetime
-from utils.helpers import get_dataframe_with_cols, exportar_pdf
-from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha
-
-def main():
-
-def main():
-
+from utils.componentes import botoes_exportacao, tabela_paginada, painel_importacao
+from servicos.planilhas import (
+    carregar_dados_da_planilha, carregar_pagina_da_planilha, enfileirar_envio_para_planilha
+)
 
 def main():
     st.subheader("👥 Cadastro de Clientes")
     
-    # Carrega dados de clientes e escritórios
-    CLIENTES = carregar_dados_da_planilha("Cliente") or []
+    # Carrega escritórios (a lista de clientes é carregada página a página)
     ESCRITORIOS = carregar_dados_da_planilha("Escritorio") or []
     nomes_escritorios = [e.get("nome", "") for e in ESCRITORIOS]
 
@@ -40,45 +36,25 @@ def main():
                     "responsavel": st.session_state.usuario,
                     "escritorio": escritorio
                 }
-                if enviar_dados_para_planilha("Cliente", novo_cliente):
-                    CLIENTES.append(novo_cliente)
-                    st.success("Cliente cadastrado com sucesso!")
+                enfileirar_envio_para_planilha("Cliente", novo_cliente)
+                st.success("Cliente cadastrado com sucesso! A gravação na planilha segue em segundo plano.")
+
+    # Importação em massa (planilha de outro sistema, cadastro inicial de um escritório)
+    with st.expander("📥 Importar clientes de CSV/XLSX"):
+        painel_importacao("Cliente", "importacao_clientes", nomes_escritorios)
 
     # Lista de clientes
     st.subheader("Lista de Clientes")
-    if CLIENTES:
-        df_cliente = get_dataframe_with_cols(
-            CLIENTES,
-            ["nome", "email", "telefone", "endereco", "cadastro"]
+    _, total_clientes = carregar_pagina_da_planilha("Cliente", limit=0)
+    if total_clientes:
+        tabela_paginada(
+            lambda offset, limite: carregar_pagina_da_planilha("Cliente", offset, limite),
+            ["nome", "email", "telefone", "endereco", "cadastro"],
+            chave="clientes"
         )
-        st.dataframe(df_cliente)
 
-        # Exportação
-        col_txt, col_pdf = st.columns(2)
-        with col_txt:
-            txt = "\n".join([
-                f"{c.get('nome','')} | {c.get('email','')} | {c.get('telefone','')}"
-                for c in CLIENTES
-            ])
-            st.download_button(
-                label="Exportar Clientes (TXT)",
-                data=txt,
-                file_name="clientes.txt",
-                mime="text/plain"
-            )
-        with col_pdf:
-            texto_pdf = "\n".join([
-                f"{c.get('nome','')} | {c.get('email','')} | {c.get('telefone','')}"
-                for c in CLIENTES
-            ])
-            pdf_file = exportar_pdf(texto_pdf, nome_arquivo="clientes")
-            with open(pdf_file, "rb") as f:
-                st.download_button(
-                    label="Exportar Clientes (PDF)",
-                    data=f,
-                    file_name="clientes.pdf",
-                    mime="application/pdf"
-                )
+        # Exportação: os arquivos só são gerados (e a aba inteira lida) quando o botão é clicado
+        botoes_exportacao(lambda: carregar_dados_da_planilha("Cliente"), "clientes", "Clientes")
     else:
         st.info("Nenhum cliente cadastrado ainda")
 
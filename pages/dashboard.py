@@ -1,53 +1,41 @@
 import streamlit as st
-import plotly.express as px
-import datetime
-from utils.helpers import converter_data, calcular_status_processo, get_dataframe_with_cols
-from servicos.planilhas import carregar_dados_da_planilha
+from utils.componentes import tabela_paginada, pagina_de_dataframe
+from servicos.armazem import obter_armazem
+from servicos.agregacoes import obter_bitmaps, contagens_por_opcao, contar_por_status, filtrar_processos
 
+# Filtros do painel: dimensão dos bitmaps -> rótulo
+FILTROS = {"area": "Área", "status": "Status", "escritorio": "Escritório", "responsavel": "Responsável"}
 
 
 def main():
     st.subheader("📋 Painel de Controle de Processos")
     
-    # Carrega dados
-    PROCESSOS = carregar_dados_da_planilha("Processo") or []
-    CLIENTES = carregar_dados_da_planilha("Cliente") or []
+    # Carrega dados e os bitmaps por valor (ambos montados uma vez por atualização)
+    armazem = obter_armazem()
+    df = armazem.processos
+    bitmaps = obter_bitmaps(armazem)
 
-    # Filtros
+    # Filtros (vários valores por filtro; vazio = todos). Cada opção mostra quantos
+    # processos restariam com ela, dadas as escolhas nos outros filtros
+    filtros = {d: st.session_state.get(f"dashboard_filtro_{d}", []) for d in FILTROS}
     with st.expander("🔍 Filtros", expanded=True):
-        col1, col2, col3 = st.columns(3)
-        filtro_area = st.selectbox(
-            "Área", ["Todas"] + sorted(set(p.get("area", "") for p in PROCESSOS)),
-            index=0
-        )
-        filtro_status = st.selectbox(
-            "Status", ["Todos", "🔴 Atrasado", "🟡 Atenção", "🟢 Normal", "🔵 Movimentado", "⚫ Encerrado"]
-        )
-        filtro_escritorio = st.selectbox(
-            "Escritório", ["Todos"] + sorted(set(p.get("escritorio", "") for p in PROCESSOS)),
-            index=0
-        )
+        colunas = st.columns(len(FILTROS))
+        for coluna, (dimensao, rotulo) in zip(colunas, FILTROS.items()):
+            contagens = contagens_por_opcao(bitmaps, filtros, dimensao)
+            opcoes = [v for v, n in contagens.items() if n or v in filtros[dimensao]]
+            with coluna:
+                filtros[dimensao] = st.multiselect(
+                    rotulo, opcoes, key=f"dashboard_filtro_{dimensao}", placeholder="Todos",
+                    format_func=lambda v, c=contagens: f"{v or '(vazio)'} ({c.get(v, 0)})"
+                )
 
-    # Aplica filtros
-    visiveis = []
-    for p in PROCESSOS:
-        status = calcular_status_processo(
-            converter_data(p.get("prazo")),
-            p.get("houve_movimentacao", False),
-            encerrado=p.get("encerrado", False)
-        )
-        if (filtro_area == "Todas" or p.get("area") == filtro_area) and \
-           (filtro_escritorio == "Todos" or p.get("escritorio") == filtro_escritorio) and \
-           (filtro_status == "Todos" or status == filtro_status):
-            p["Status"] = status
-            visiveis.append(p)
-
-    # Métricas
-    total = len(visiveis)
-    atrasados = sum(1 for p in visiveis if p["Status"] == "🔴 Atrasado")
-    atencao = sum(1 for p in visiveis if p["Status"] == "🟡 Atenção")
-    movimentados = sum(1 for p in visiveis if p["Status"] == "🔵 Movimentado")
-    encerrados = sum(1 for p in visiveis if p["Status"] == "⚫ Encerrado")
+    # Métricas (popcount dos bitmaps, sem percorrer os processos)
+    contagem = contar_por_status(bitmaps, filtros)
+    total = sum(contagem.values())
+    atrasados = contagem["🔴 Atrasado"]
+    atencao = contagem["🟡 Atenção"]
+    movimentados = contagem["🔵 Movimentado"]
+    encerrados = contagem["⚫ Encerrado"]
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Total", total)
     col2.metric("Atrasados", atrasados)
@@ -57,6 +45,7 @@ def main():
 
     # Gráfico de pizza
     if total > 0:
+        import plotly.express as px  # só carregado quando o gráfico é exibido
         fig = px.pie(
             values=[atrasados, atencao, movimentados, encerrados, total - (atrasados + atencao + movimentados + encerrados)],
             names=["Atrasados", "Atenção", "Movimentados", "Encerrados", "Outros"],
@@ -66,9 +55,13 @@ def main():
 
     # Tabela de processos
     st.subheader("📋 Lista de Processos")
-    if visiveis:
-        df = get_dataframe_with_cols(visiveis, ["numero", "cliente", "area", "prazo", "responsavel", "Status"])
-        st.dataframe(df)
+    if total > 0:
+        visiveis = filtrar_processos(df, bitmaps, filtros)
+        tabela_paginada(
+            pagina_de_dataframe(visiveis),
+            ["numero", "cliente", "area", "prazo", "responsavel", "Status"],
+            chave="dashboard"
+        )
     else:
         st.info("Nenhum processo encontrado com os filtros aplicados")
 
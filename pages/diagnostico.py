@@ -0,0 +1,76 @@
+import streamlit as st
+from servicos import metricas, fila_envios, revalidacao, monitor_esaj
+from servicos.conexoes import estatisticas_conexoes
+
+
+def main():
+    st.subheader("🩺 Diagnóstico de Desempenho")
+    if st.session_state.get("papel") != "owner":
+        st.error("Acesso restrito ao dono do sistema.")
+        return
+
+    st.caption("Métricas deste processo do servidor, desde a última inicialização (ou desde que foram zeradas).")
+
+    # Latência por operação (chamadas ao GAS e ao ESAJ, páginas e exportações)
+    st.markdown("#### ⏱️ Latência (ms)")
+    latencias = metricas.resumo_histogramas("latencia_ms")
+    if latencias:
+        st.dataframe(latencias)
+    else:
+        st.info("Nenhuma operação medida ainda.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 📦 Tamanho dos payloads (bytes)")
+        payloads = metricas.resumo_histogramas("payload_bytes")
+        if payloads:
+            st.dataframe(payloads)
+        else:
+            st.info("Nenhum payload registrado.")
+    with col2:
+        st.markdown("#### 🎯 Caches")
+        taxas = metricas.taxas_de_acerto()
+        if taxas:
+            st.dataframe(
+                [{"cache": c, "consultas": n, "acertos": a, "taxa de acerto": f"{t:.0%}"}
+                 for c, (n, a, t) in taxas.items()]
+            )
+        else:
+            st.info("Nenhuma consulta a cache registrada.")
+
+    st.markdown("#### ❌ Erros")
+    erros = metricas.resumo_contadores("erros")
+    if erros:
+        st.dataframe(erros)
+    else:
+        st.success("Nenhum erro registrado.")
+
+    st.markdown("#### 🔌 Conexões HTTP e fila de envios")
+    col1, col2 = st.columns(2)
+    col1.json(estatisticas_conexoes())
+    col2.json(fila_envios.resumo())
+    st.caption(f"Abas em revalidação: {', '.join(revalidacao.pendentes()) or 'nenhuma'}")
+
+    st.markdown("#### ⚖️ Monitoramento do ESAJ")
+    if not monitor_esaj.ESAJ_MONITORAMENTO:
+        st.caption("Desligado (ESAJ_MONITORAMENTO=1 para ligar).")
+    st.json(monitor_esaj.resumo())
+
+    # Exportação para o Prometheus (ou qualquer coletor que leia o formato de texto)
+    texto = metricas.exportar_prometheus()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "⬇️ Exportar métricas (Prometheus)", data=texto,
+            file_name="metricas.prom", mime="text/plain; version=0.0.4",
+        )
+    with col2:
+        if st.button("Zerar métricas"):
+            metricas.zerar()
+            st.rerun()
+    with st.expander("Ver texto exportado"):
+        st.code(texto, language="text")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 import streamlit as st
 import datetime
-from utils.helpers import get_dataframe_with_cols, exportar_pdf
-from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha
+from utils.helpers import get_dataframe_with_cols
+from utils.componentes import botoes_exportacao
+from servicos.planilhas import carregar_dados_da_planilha, enfileirar_envio_para_planilha
 
 
 def main():
     st.subheader("🏢 Gerenciamento de Escritórios")
-    ESCRITORIOS = carregar_dados_da_planilha("Escritorio") or []
 
     tab1, tab2, tab3 = st.tabs([
         "Cadastrar Escritório", "Lista de Escritórios", "Administradores"
@@ -47,43 +47,21 @@ def main():
                         "email_tecnico": email_tecnico,
                         "area_atuacao": ", ".join(area_atuacao)
                     }
-                    if enviar_dados_para_planilha("Escritorio", novo_escritorio):
-                        ESCRITORIOS.append(novo_escritorio)
-                        st.success("Escritório cadastrado com sucesso!")
+                    enfileirar_envio_para_planilha("Escritorio", novo_escritorio)
+                    st.success("Escritório cadastrado com sucesso! A gravação na planilha segue em segundo plano.")
 
     # Aba: Lista de Escritórios
     with tab2:
+        # Carregada depois do formulário: o escritório recém-salvo já está na réplica
+        ESCRITORIOS = carregar_dados_da_planilha("Escritorio") or []
         if ESCRITORIOS:
             df_esc = get_dataframe_with_cols(
                 ESCRITORIOS,
                 ["nome", "endereco", "telefone", "email", "cnpj"]
             )
             st.dataframe(df_esc)
-            col_txt, col_pdf = st.columns(2)
-            with col_txt:
-                txt = "\n".join([
-                    f"{e.get('nome','')} | {e.get('endereco','')} | {e.get('telefone','')}"
-                    for e in ESCRITORIOS
-                ])
-                st.download_button(
-                    "Exportar Escritórios (TXT)",
-                    data=txt,
-                    file_name="escritorios.txt",
-                    mime="text/plain"
-                )
-            with col_pdf:
-                txt_pdf = "\n".join([
-                    f"{e.get('nome','')} | {e.get('endereco','')} | {e.get('telefone','')}"
-                    for e in ESCRITORIOS
-                ])
-                pdf_file = exportar_pdf(txt_pdf, nome_arquivo="escritorios")
-                with open(pdf_file, "rb") as f:
-                    st.download_button(
-                        "Exportar Escritórios (PDF)",
-                        data=f,
-                        file_name="escritorios.pdf",
-                        mime="application/pdf"
-                    )
+            # Exportação: os arquivos só são gerados quando o botão é clicado
+            botoes_exportacao(ESCRITORIOS, "escritorios", "Escritórios")
         else:
             st.info("Nenhum escritório cadastrado ainda")
 
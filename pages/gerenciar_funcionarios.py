@@ -1,16 +1,18 @@
 import streamlit as st
 import datetime
-from utils.helpers import get_dataframe_with_cols, exportar_pdf
-from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha
+from utils.componentes import botoes_exportacao, tabela_paginada
+from servicos.usuarios import gerar_hash_senha
+from servicos.planilhas import (
+    carregar_dados_da_planilha, carregar_pagina_da_planilha, enfileirar_envio_para_planilha
+)
 
 
 def main():
     st.subheader("👥 Cadastro de Funcionários")
 
-    # Carrega dados de escritórios e funcionários
+    # Carrega escritórios (a lista de funcionários é carregada página a página)
     ESCRITORIOS = carregar_dados_da_planilha("Escritorio") or []
     nomes_escritorios = [e.get("nome", "Global") for e in ESCRITORIOS] or ["Global"]
-    FUNCIONARIOS = carregar_dados_da_planilha("Funcionario") or []
 
     # Formulário de cadastro
     with st.form("form_funcionario"):
@@ -34,57 +36,35 @@ def main():
                     "email": email,
                     "telefone": telefone,
                     "usuario": usuario_novo,
-                    "senha": senha_novo,
+                    "senha": gerar_hash_senha(senha_novo),
                     "escritorio": escritorio,
                     "area": area_atuacao,
                     "papel": papel_func,
                     "data_cadastro": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     "cadastrado_por": st.session_state.usuario
                 }
-                if enviar_dados_para_planilha("Funcionario", novo_funcionario):
-                    st.success("Funcionário cadastrado com sucesso!")
+                enfileirar_envio_para_planilha("Funcionario", novo_funcionario)
+                st.success("Funcionário cadastrado com sucesso! A gravação na planilha segue em segundo plano.")
 
     # Lista de funcionários
     st.subheader("Lista de Funcionários")
     papel = st.session_state.get("papel", "")
     escritorio_usuario = st.session_state.dados_usuario.get("escritorio", "Global")
-    if papel == "manager":
-        funcionarios_visiveis = [f for f in FUNCIONARIOS if f.get("escritorio") == escritorio_usuario]
-    else:
-        funcionarios_visiveis = FUNCIONARIOS
+    filtros = {"escritorio": escritorio_usuario} if papel == "manager" else None
 
-    if funcionarios_visiveis:
-        df_func = get_dataframe_with_cols(
-            funcionarios_visiveis,
-            ["nome", "email", "telefone", "usuario", "papel", "escritorio", "area"]
+    _, total_funcionarios = carregar_pagina_da_planilha("Funcionario", limit=0, filtros=filtros)
+    if total_funcionarios:
+        tabela_paginada(
+            lambda offset, limite: carregar_pagina_da_planilha("Funcionario", offset, limite, filtros=filtros),
+            ["nome", "email", "telefone", "usuario", "papel", "escritorio", "area"],
+            chave="funcionarios"
         )
-        st.dataframe(df_func)
 
-        col_txt, col_pdf = st.columns(2)
-        with col_txt:
-            txt = "\n".join([
-                f"{f.get('nome','')} | {f.get('email','')} | {f.get('telefone','')}"
-                for f in funcionarios_visiveis
-            ])
-            st.download_button(
-                label="Exportar Funcionários (TXT)",
-                data=txt,
-                file_name="funcionarios.txt",
-                mime="text/plain"
-            )
-        with col_pdf:
-            texto_pdf = "\n".join([
-                f"{f.get('nome','')} | {f.get('email','')} | {f.get('telefone','')}"
-                for f in funcionarios_visiveis
-            ])
-            pdf_file = exportar_pdf(texto_pdf, nome_arquivo="funcionarios")
-            with open(pdf_file, "rb") as f:
-                st.download_button(
-                    label="Exportar Funcionários (PDF)",
-                    data=f,
-                    file_name="funcionarios.pdf",
-                    mime="application/pdf"
-                )
+        # Exportação: os arquivos só são gerados (e a lista inteira lida) quando o botão é clicado
+        botoes_exportacao(
+            lambda: carregar_pagina_da_planilha("Funcionario", filtros=filtros)[0],
+            "funcionarios", "Funcionários"
+        )
     else:
         st.info("Nenhum funcionário cadastrado ainda")
 
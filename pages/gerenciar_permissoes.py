@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha
+from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha, atualizar_no_cache
 
 
 def main():
@@ -12,12 +11,11 @@ def main():
         st.info("Nenhum funcionário cadastrado.")
         return
 
-    # Exibe tabela de funcionários
-    df = pd.DataFrame(FUNCIONARIOS)
-    st.dataframe(df)
+    # Exibe tabela de funcionários (sem pandas: a página não deve pagar o import dele)
+    st.dataframe([{k: v for k, v in f.items() if k != "senha"} for f in FUNCIONARIOS])
 
     # Seleciona funcionário
-    nomes = df["nome"].tolist()
+    nomes = [f.get("nome", "") for f in FUNCIONARIOS]
     selecionado = st.selectbox("Funcionário", nomes)
 
     # Define novas áreas permitidas
@@ -26,20 +24,16 @@ def main():
     )
 
     if st.button("Atualizar Permissões"):
-        atualizado = False
         area_str = ", ".join(novas_areas)
-        # Atualiza lista local e session_state
-        for func in FUNCIONARIOS:
-            if func.get("nome") == selecionado:
-                func["area"] = area_str
-                atualizado = True
-                # Também atualiza o estado de sessão
-                for key, user in st.session_state.USERS.items():
-                    if user.get("username") == func.get("usuario"):
-                        st.session_state.USERS[key]["area"] = area_str
-        if atualizado:
+        # Os registros carregados são compartilhados e somente leitura; a alteração vai
+        # para a planilha e para a réplica, e a sessão só atualiza os próprios dados
+        func = next((f for f in FUNCIONARIOS if f.get("nome") == selecionado), None)
+        if func is not None:
             payload = {"nome": selecionado, "area": area_str, "atualizar": True}
             if enviar_dados_para_planilha("Funcionario", payload):
+                atualizar_no_cache("Funcionario", "nome", selecionado, {"area": area_str})
+                if func.get("usuario") == st.session_state.get("usuario"):
+                    st.session_state.dados_usuario = {**st.session_state.dados_usuario, "area": area_str}
                 st.success("Permissões atualizadas com sucesso!")
             else:
                 st.error("Falha ao atualizar permissões.")
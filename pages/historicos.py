@@ -1,28 +1,52 @@
 import streamlit as st
 import datetime
-from servicos.planilhas import carregar_dados_da_planilha
+from servicos.indice_historico import obter_indice_historico
+from servicos.planilhas import carregar_corpo_da_planilha
+from servicos.replica import chave_da_linha
+
+
+def _peticao(item, titulo, prefixo):
+    # Só o cabeçalho é desenhado; o conteúdo é buscado (e enviado ao navegador)
+    # quando o expander é aberto
+    chave = chave_da_linha("Historico_Peticao", item)
+    with st.expander(titulo, key=f"{prefixo}_{chave}", on_change="rerun") as painel:
+        if painel.open:
+            st.write(f"**Responsável:** {item.get('responsavel','')}  ")
+            st.write(f"**Escritório:** {item.get('escritorio','')}  ")
+            st.text_area(
+                "Conteúdo", value=carregar_corpo_da_planilha("Historico_Peticao", chave),
+                key=f"{prefixo}_conteudo_{chave}", disabled=True,
+            )
 
 
 def main():
     st.subheader("📜 Histórico de Processos + Consulta TJMG")
     
-    # Carrega dados de histórico
-    HISTORICO_PETICOES = carregar_dados_da_planilha("Historico_Peticao") or []
+    # Índices do histórico (atualizados só com as petições novas)
+    indice = obter_indice_historico()
 
     # Consulta de histórico interno
     num_proc = st.text_input("Digite o número do processo para consultar o histórico")
     if num_proc:
-        historico_filtrado = [h for h in HISTORICO_PETICOES if h.get("numero") == num_proc]
+        historico_filtrado = indice.por_processo(num_proc)
         if historico_filtrado:
             st.write(f"{len(historico_filtrado)} registro(s) encontrado(s) para o processo {num_proc}:")
             for item in historico_filtrado:
-                with st.expander(f"{item.get('tipo','')} - {item.get('data','')} - {item.get('cliente_associado','')}" , expanded=False):
-                    st.write(f"**Responsável:** {item.get('responsavel','')}  ")
-                    st.write(f"**Escritório:** {item.get('escritorio','')}  ")
-                    st.text_area("Conteúdo", value=item.get("conteudo",""), key=item.get('data',''), disabled=True)
+                _peticao(item, f"{item.get('tipo','')} - {item.get('data','')} - {item.get('cliente_associado','')}", "processo")
         else:
             st.info("Nenhum histórico encontrado para esse processo.")
 
+    # Busca no texto das petições
+    consulta = st.text_input("Buscar no conteúdo das petições (tipo, cliente ou texto)")
+    if consulta:
+        resultados = indice.buscar(consulta, limite=20)
+        if resultados:
+            st.write(f"{len(resultados)} petição(ões) mais relevantes para \"{consulta}\":")
+            for pontuacao, item in resultados:
+                _peticao(item, f"{item.get('numero','')} - {item.get('tipo','')} - {item.get('data','')} - {item.get('cliente_associado','')}", "busca")
+        else:
+            st.info("Nenhuma petição encontrada para essa busca.")
+
     # Iframe de consulta externa
     st.markdown("**Consulta TJMG (iframe)**")
     iframe_html = '''
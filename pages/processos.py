@@ -1,16 +1,13 @@
 import streamlit as st
 import datetime
-from utils.helpers import get_dataframe_with_cols, converter_data, calcular_status_processo, exportar_pdf
-from servicos.planilhas import carregar_dados_da_planilha, enviar_dados_para_planilha
+from utils.componentes import botoes_exportacao, tabela_paginada, painel_importacao, pagina_de_dataframe
+from servicos.planilhas import enfileirar_envio_para_planilha
+from servicos.armazem import obter_armazem
 
 
 def main():
     st.subheader("📄 Cadastro de Processos")
 
-    # Carrega dados
-    PROCESSOS = carregar_dados_da_planilha("Processo") or []
-    ESCRITORIOS = carregar_dados_da_planilha("Escritorio") or []
-
     # Formulário de cadastro
     with st.form("form_processo"):
         cliente_nome = st.text_input("Cliente*")
@@ -48,58 +45,29 @@ def main():
                     "link_material": link_material,
                     "data_cadastro": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }
-                if enviar_dados_para_planilha("Processo", novo_processo):
-                    PROCESSOS.append(novo_processo)
-                    st.success("Processo cadastrado com sucesso!")
+                enfileirar_envio_para_planilha("Processo", novo_processo)
+                st.success("Processo cadastrado com sucesso! A gravação na planilha segue em segundo plano.")
+
+    # Importação em massa (planilha de outro sistema, cadastro inicial de um escritório)
+    with st.expander("📥 Importar processos de CSV/XLSX"):
+        painel_importacao("Processo", "importacao_processos")
 
-    # Lista de processos cadastrados
+    # Lista de processos cadastrados (inclui o que acabou de ser salvo)
     st.subheader("Lista de Processos Cadastrados")
-    if PROCESSOS:
-        df_proc = get_dataframe_with_cols(
-            PROCESSOS,
-            ["numero", "cliente", "area", "prazo", "responsavel"]
+    armazem = obter_armazem()
+    df_proc = armazem.processos
+    if len(df_proc):
+        # Status é categórico, na ordem de STATUS_PROCESSO; a ordem vem pronta do
+        # armazém e cada página lê só as suas linhas do DataFrame compartilhado
+        ordem = armazem.ordem_por_status
+        tabela_paginada(
+            pagina_de_dataframe(df_proc, ordem),
+            ["numero", "cliente", "area", "prazo", "responsavel", "Status"],
+            chave="processos"
         )
-        # Calcula e adiciona status
-        df_proc['Status'] = df_proc.apply(
-            lambda row: calcular_status_processo(
-                converter_data(row.get('prazo')),
-                row.get('houve_movimentacao', False),
-                row.get('encerrado', False)
-            ), axis=1
-        )
-        # Ordena por status
-        status_order = {"🔴 Atrasado": 0, "🟡 Atenção": 1, "🟢 Normal": 2, "🔵 Movimentado": 3, "⚫ Encerrado": 4}
-        df_proc['Status_Order'] = df_proc['Status'].map(status_order)
-        df_proc = df_proc.sort_values('Status_Order').drop('Status_Order', axis=1)
-
-        st.dataframe(df_proc)
 
-        # Botões de exportação
-        col_txt, col_pdf = st.columns(2)
-        with col_txt:
-            txt = "\n".join([
-                f"{p.get('numero','')} | {p.get('cliente','')} | {p.get('area','')} | {p.get('prazo','')} | {p.get('responsavel','')}"
-                for p in PROCESSOS
-            ])
-            st.download_button(
-                label="Exportar Processos (TXT)",
-                data=txt,
-                file_name="processos.txt",
-                mime="text/plain"
-            )
-        with col_pdf:
-            texto_pdf = "\n".join([
-                f"{p.get('numero','')} | {p.get('cliente','')} | {p.get('area','')} | {p.get('prazo','')} | {p.get('responsavel','')}"
-                for p in PROCESSOS
-            ])
-            pdf_file = exportar_pdf(texto_pdf, nome_arquivo="processos")
-            with open(pdf_file, "rb") as f:
-                st.download_button(
-                    label="Exportar Processos (PDF)",
-                    data=f,
-                    file_name="processos.pdf",
-                    mime="application/pdf"
-                )
+        # Exportação: os arquivos só são gerados quando o botão é clicado
+        botoes_exportacao(lambda: df_proc.iloc[ordem], "processos", "Processos")
     else:
         st.info("Nenhum processo cadastrado ainda")
 
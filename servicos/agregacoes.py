@@ -0,0 +1,91 @@
+# servicos/agregacoes.py
+from collections import namedtuple
+import numpy as np
+import streamlit as st
+from utils.helpers import STATUS_PROCESSO
+from .armazem import obter_armazem
+
+# Índices de bitmap dos processos, montados uma vez por atualização dos dados: para
+# cada valor de área, escritório, status e responsável, um inteiro em que o bit i diz
+# se a linha i do armazém tem aquele valor. Filtros viram OR dentro de uma dimensão e
+# AND entre dimensões; contagens são só a quantidade de bits ligados.
+
+# Dimensão do filtro -> coluna do armazém
+DIMENSOES = {"area": "area", "escritorio": "escritorio", "status": "Status", "responsavel": "responsavel"}
+
+Bitmaps = namedtuple("Bitmaps", ["por_valor", "todos", "total"])
+
+def _bits(mascara):
+    return int.from_bytes(np.packbits(mascara, bitorder="little").tobytes(), "little")
+
+def construir_bitmaps(processos):
+    """
+    Um bitmap por valor de cada dimensão, na ordem das categorias.
+    `processos` é o DataFrame do armazém (colunas categóricas).
+    """
+    por_valor = {}
+    for dimensao, coluna in DIMENSOES.items():
+        serie = processos[coluna]
+        codigos = serie.cat.codes.to_numpy()
+        por_valor[dimensao] = {
+            str(valor): _bits(codigos == i) for i, valor in enumerate(serie.cat.categories)
+        }
+    total = len(processos)
+    return Bitmaps(por_valor, (1 << total) - 1, total)
+
+def selecao(bitmaps, filtros, exceto=None):
+    """
+    Bitmap das linhas que atendem a `filtros` ({dimensão: valores}; vazio = todos),
+    ignorando a dimensão `exceto`.
+    """
+    resultado = bitmaps.todos
+    for dimensao, valores in filtros.items():
+        if not valores or dimensao == exceto:
+            continue
+        por_valor = bitmaps.por_valor[dimensao]
+        uniao = 0
+        for valor in valores:
+            uniao |= por_valor.get(valor, 0)
+        resultado &= uniao
+    return resultado
+
+def contagens_por_opcao(bitmaps, filtros, dimensao):
+    """
+    {valor: quantidade} de cada opção da `dimensao` sob os filtros das demais dimensões
+    (o que a opção mostraria se fosse escolhida).
+    """
+    base = selecao(bitmaps, filtros, exceto=dimensao)
+    return {valor: (base & bits).bit_count() for valor, bits in bitmaps.por_valor[dimensao].items()}
+
+def contar_por_status(bitmaps, filtros):
+    """
+    Contagem por status das linhas selecionadas por `filtros`, sem tocar nas linhas.
+    """
+    selecionadas = selecao(bitmaps, filtros)
+    por_status = bitmaps.por_valor["status"]
+    return {s: (selecionadas & por_status.get(s, 0)).bit_count() for s in STATUS_PROCESSO}
+
+def filtrar_processos(processos, bitmaps, filtros):
+    """
+    Materializa só as linhas selecionadas por `filtros`.
+    """
+    selecionadas = selecao(bitmaps, filtros)
+    if selecionadas == bitmaps.todos:
+        return processos
+    bytes_ = np.frombuffer(selecionadas.to_bytes((bitmaps.total + 7) // 8, "little"), dtype=np.uint8)
+    indices = np.flatnonzero(np.unpackbits(bytes_, bitorder="little")[:bitmaps.total])
+    return processos.iloc[indices]
+
+# Chave: geração do armazém, que muda a cada remontagem (nova versão das abas,
+# troca de dia ou expiração) mesmo que as versões das abas sejam as mesmas
+@st.cache_resource(ttl=300, max_entries=4, show_spinner=False)
+def _bitmaps(geracao, _processos):
+    return construir_bitmaps(_processos)
+
+def obter_bitmaps(armazem=None):
+    """
+    Bitmaps do `armazem` (padrão: o atual), reconstruídos junto com ele.
+    Passe o mesmo armazém de onde vêm os processos para que as linhas correspondam.
+    """
+    armazem = armazem or obter_armazem()
+    return _bitmaps(armazem.geracao, armazem.processos)
@@ -0,0 +1,125 @@
+# servicos/armazem.py
+import time
+import datetime
+import itertools
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.helpers import calcular_status_processos, converter_datas
+from .planilhas import carregar_varias_abas, versao_aba
+
+# Armazém colunar único por processo: as abas viram DataFrames tipados uma vez
+# por atualização dos dados e o mesmo objeto é compartilhado por todas as sessões.
+# Os DataFrames são somente leitura: derive colunas numa cópia (df.assign / df.copy()).
+# Com copy-on-write, essas cópias compartilham os buffers das colunas não alteradas e
+# os arrays obtidos com .to_numpy() não podem ser escritos.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)  # padrão a partir do pandas 3
+
+ABAS_DO_ARMAZEM = ("Processo", "Cliente", "Escritorio", "Historico_Peticao")
+ARMAZEM_TTL = 300
+
+COLUNAS_PROCESSO = [
+    "numero", "cliente", "contrato", "descricao", "valor_total", "valor_movimentado",
+    "prazo_inicial", "prazo", "houve_movimentacao", "encerrado", "responsavel",
+    "area", "escritorio", "link_material", "data_cadastro",
+]
+COLUNAS_CLIENTE = [
+    "nome", "email", "telefone", "aniversario", "endereco", "observacoes",
+    "cadastro", "responsavel", "escritorio",
+]
+COLUNAS_ESCRITORIO = [
+    "nome", "endereco", "telefone", "email", "cnpj", "data_cadastro",
+    "responsavel_tecnico", "telefone_tecnico", "email_tecnico", "area_atuacao",
+]
+# Sem "conteudo": o texto das petições fica comprimido na réplica e é lido sob demanda
+# ("id" é a chave de cada petição na réplica, ver replica.chave_da_linha)
+COLUNAS_HISTORICO = [
+    "id", "numero", "tipo", "data", "cliente_associado", "responsavel", "escritorio",
+]
+
+# ordem_por_status: posições dos processos ordenados por Status (ordenação estável),
+# para as telas paginarem nessa ordem sem copiar o DataFrame.
+# geracao: número único de cada montagem do armazém no processo; muda sempre que ele é
+# remontado (mesmo com as mesmas versões, ex.: TTL vencido), e é a chave dos índices
+# derivados dele
+Armazem = namedtuple(
+    "Armazem",
+    ["processos", "clientes", "escritorios", "historico", "versao", "ordem_por_status", "geracao"],
+)
+_geracoes = itertools.count(1)
+
+def _tabela(linhas, colunas, categoricas=(), numericas=(), booleanas=()):
+    df = pd.DataFrame(linhas)
+    for c in colunas:
+        if c not in df.columns:
+            df[c] = ""
+    for c in df.columns:
+        if c in numericas:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        elif c in booleanas:
+            df[c] = (df[c].notna() & df[c].astype(bool)).astype(bool)
+        elif c in categoricas:
+            df[c] = df[c].fillna("").astype(str).astype("category")
+        else:
+            df[c] = df[c].where(df[c].notna(), "").astype(str)
+    return df
+
+def _tabela_processos(linhas):
+    df = _tabela(
+        linhas, COLUNAS_PROCESSO,
+        categoricas=("area", "escritorio", "responsavel", "contrato"),
+        numericas=("valor_total", "valor_movimentado"),
+        booleanas=("houve_movimentacao", "encerrado"),
+    )
+    df["prazo_data"] = converter_datas(df["prazo"])
+    df["Status"] = calcular_status_processos(df["prazo"], df["houve_movimentacao"], df["encerrado"])
+    return df
+
+def _tabela_historico(linhas):
+    df = _tabela(linhas, COLUNAS_HISTORICO, categoricas=("tipo", "responsavel", "escritorio"))
+    df["data_valor"] = converter_datas(df["data"])
+    return df
+
+_ultima_construcao = 0.0
+
+@st.cache_resource(ttl=ARMAZEM_TTL, show_spinner=False)
+def _construir_armazem(versoes, hoje):
+    global _ultima_construcao
+    _ultima_construcao = time.time()
+    abas = carregar_varias_abas(ABAS_DO_ARMAZEM)
+    processos = _tabela_processos(abas["Processo"])
+    ordem = np.argsort(processos["Status"].cat.codes.to_numpy(), kind="stable")
+    ordem.flags.writeable = False
+    return Armazem(
+        processos=processos,
+        clientes=_tabela(abas["Cliente"], COLUNAS_CLIENTE, categoricas=("escritorio", "responsavel")),
+        escritorios=_tabela(abas["Escritorio"], COLUNAS_ESCRITORIO),
+        historico=_tabela_historico(abas["Historico_Peticao"]),
+        versao=versoes,
+        ordem_por_status=ordem,
+        geracao=next(_geracoes),
+    )
+
+def obter_armazem():
+    """
+    Devolve o armazém compartilhado, reconstruído quando alguma aba é invalidada,
+    quando o TTL expira ou quando a data muda (o Status depende de hoje).
+    """
+    versoes = tuple(versao_aba(t) for t in ABAS_DO_ARMAZEM)
+    return _construir_armazem(versoes, datetime.date.today().isoformat())
+
+def preaquecer_armazem(tipo, margem):
+    """
+    Chamado pela thread de revalidação depois de atualizar a aba `tipo`: se o armazém
+    já foi montado e expira em menos de `margem` segundos, reconstrói o da versão
+    atual, para que nenhuma sessão pague a reconstrução.
+    """
+    if tipo not in ABAS_DO_ARMAZEM or not _ultima_construcao:
+        return
+    if time.time() - _ultima_construcao >= ARMAZEM_TTL - margem:
+        versoes = tuple(versao_aba(t) for t in ABAS_DO_ARMAZEM)
+        hoje = datetime.date.today().isoformat()
+        _construir_armazem.clear(versoes, hoje)
+        _construir_armazem(versoes, hoje)
@@ -0,0 +1,19 @@
+# servicos/armazenamento.py
+import os
+import sqlite3
+from dotenv import load_dotenv
+
+load_dotenv()
+DADOS_LOCAIS_DIR = os.getenv("DADOS_LOCAIS_DIR", ".dados")
+
+def conectar(nome):
+    """
+    Abre (criando se necessário) o banco SQLite local `nome` em DADOS_LOCAIS_DIR.
+    Cada chamada devolve uma conexão nova: use uma conexão por thread.
+    """
+    os.makedirs(DADOS_LOCAIS_DIR, exist_ok=True)
+    caminho = os.path.join(DADOS_LOCAIS_DIR, f"{nome}.sqlite3")
+    conn = sqlite3.connect(caminho, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,81 @@
+# servicos/conexoes.py
+import os
+import threading
+import weakref
+import httpx
+from dotenv import load_dotenv
+
+# Cliente HTTP único do processo (GAS e tribunais), com pool de conexões
+# keep-alive. httpx.Client é thread-safe, então todas as sessões o compartilham.
+
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 no httpx)
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+load_dotenv()
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRA = float(os.getenv("HTTP_KEEPALIVE_EXPIRA", "60"))
+
+_lock = threading.Lock()
+_cliente = None
+_conexoes_vistas = weakref.WeakSet()
+_contadores = {"requisicoes": 0, "conexoes_novas": 0, "conexoes_reutilizadas": 0}
+
+def _registrar_resposta(resp):
+    # Cada conexão TCP/TLS tem um único network_stream: se já o vimos, a conexão foi reaproveitada
+    stream = resp.extensions.get("network_stream")
+    with _lock:
+        _contadores["requisicoes"] += 1
+        if stream is None:
+            return
+        if stream in _conexoes_vistas:
+            _contadores["conexoes_reutilizadas"] += 1
+        else:
+            _conexoes_vistas.add(stream)
+            _contadores["conexoes_novas"] += 1
+
+def obter_cliente():
+    """
+    Devolve o httpx.Client compartilhado, criando-o na primeira chamada.
+    Limites e timeout vêm de HTTP_MAX_CONEXOES, HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRA e HTTP_TIMEOUT; HTTP/2 é usado se o pacote h2 estiver instalado.
+    """
+    global _cliente
+    if _cliente is None:
+        with _lock:
+            if _cliente is None:
+                _cliente = httpx.Client(
+                    http2=HTTP2_DISPONIVEL,
+                    timeout=HTTP_TIMEOUT,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONEXOES,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRA,
+                    ),
+                    event_hooks={"response": [_registrar_resposta]},
+                )
+    return _cliente
+
+def estatisticas_conexoes():
+    """
+    Contadores de uso do pool: requisições, conexões novas e reaproveitadas.
+    """
+    with _lock:
+        stats = dict(_contadores)
+    stats["http2"] = HTTP2_DISPONIVEL
+    return stats
+
+def fechar_cliente():
+    """
+    Fecha o cliente compartilhado (a próxima chamada a obter_cliente cria outro).
+    """
+    global _cliente
+    with _lock:
+        if _cliente is not None:
+            _cliente.close()
+            _cliente = None
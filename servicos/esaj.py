@@ -1,19 +1,201 @@
 # servicos/esaj.py
-import requests
-from bs4 import BeautifulSoup
+import os
+import re
+import json
+import time
+import threading
+from contextlib import closing
+from itertools import islice
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+from .armazenamento import conectar
+from .conexoes import obter_cliente
+from . import metricas
+
+ESAJ_URL = "https://esaj.tjsp.jus.br/cpopg/show.do?processo.codigo={numero}"
+ESAJ_MAX_CONCORRENCIA = int(os.getenv("ESAJ_MAX_CONCORRENCIA", "4"))
+ESAJ_REQUISICOES_POR_SEGUNDO = float(os.getenv("ESAJ_REQUISICOES_POR_SEGUNDO", "2"))
+ESAJ_CACHE_TTL = int(os.getenv("ESAJ_CACHE_TTL", "3600"))
+
+try:
+    import lxml  # noqa: F401
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+def _classe_de_andamento(classes):
+    # Durante o parse o atributo pode chegar como texto ("fundocinza1 outra") ou já separado
+    if classes is None:
+        return False
+    if isinstance(classes, str):
+        classes = classes.split()
+    return "fundocinza1" in classes
+
+# Só as linhas de andamento viram objetos; o resto da página é descartado durante o parse
+_SO_ANDAMENTOS = SoupStrainer("tr", class_=_classe_de_andamento)
+_INICIO_ANDAMENTO = re.compile(r"""<tr\b[^>]*\bclass\s*=\s*["']?[^"'>]*\bfundocinza1\b""", re.IGNORECASE)
+
+class LimitadorPorHost:
+    """
+    Balde de fichas por host: no máximo `por_segundo` requisições por segundo
+    (com rajada de até `rajada`), compartilhado entre todas as threads.
+    """
+    def __init__(self, por_segundo, rajada=1):
+        self.por_segundo = por_segundo
+        self.rajada = rajada
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, host):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                fichas, antes = self._baldes.get(host, (self.rajada, agora))
+                fichas = min(self.rajada, fichas + (agora - antes) * self.por_segundo)
+                if fichas >= 1:
+                    self._baldes[host] = (fichas - 1, agora)
+                    return
+                self._baldes[host] = (fichas, agora)
+                espera = (1 - fichas) / self.por_segundo
+            time.sleep(espera)
+
+limitador = LimitadorPorHost(ESAJ_REQUISICOES_POR_SEGUNDO)
+
+def _extrair_movimentacoes(html, limite=5):
+    # Corta a página antes da primeira linha de andamento que não será usada
+    excedente = next(islice(_INICIO_ANDAMENTO.finditer(html), limite, None), None)
+    if excedente is not None:
+        html = html[:excedente.start()]
+    soup = BeautifulSoup(html, PARSER_HTML, parse_only=_SO_ANDAMENTOS)
+    andamentos = soup.find_all("tr", class_="fundocinza1", limit=limite)
+    return [a.get_text(strip=True) for a in andamentos]
+
+def _buscar_movimentacoes(numero_processo):
+    """
+    Consulta o ESAJ respeitando o limite por host; levanta exceção em caso de erro.
+    """
+    url = ESAJ_URL.format(numero=numero_processo)
+    limitador.aguardar(urlsplit(url).hostname)
+    with metricas.medir("esaj_get"):
+        r = obter_cliente().get(url)
+        r.raise_for_status()
+    metricas.registrar_payload("esaj_get", len(r.content))
+    with metricas.medir("esaj_parse"):
+        return _extrair_movimentacoes(r.text)
 
 def consultar_movimentacoes_simples(numero_processo):
     """
     Busca as últimas movimentações de um processo no ESAJ TJSP.
     """
-    url = f"https://esaj.tjsp.jus.br/cpopg/show.do?processo.codigo={numero_processo}"
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
-        andamentos = soup.find_all("tr", class_="fundocinza1")
+        andamentos = _buscar_movimentacoes(numero_processo)
         if andamentos:
-            return [a.get_text(strip=True) for a in andamentos[:5]]
+            return andamentos
         return ["Nenhuma movimentação encontrada"]
-    except:
+    except Exception:
         return ["Erro ao consultar movimentações"]
+
+def _abrir_cache():
+    conn = conectar("esaj")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS movimentacoes (
+            numero        TEXT PRIMARY KEY,
+            andamentos    TEXT NOT NULL,
+            consultado_em REAL NOT NULL,
+            alterado_em   REAL
+        )
+    """)
+    return conn
+
+def _ler_cache(numeros):
+    with closing(_abrir_cache()) as conn:
+        linhas = []
+        for i in range(0, len(numeros), 500):
+            bloco = numeros[i:i + 500]
+            linhas += conn.execute(
+                f"SELECT numero, andamentos, consultado_em FROM movimentacoes "
+                f"WHERE numero IN ({','.join('?' * len(bloco))})",
+                bloco,
+            ).fetchall()
+    return {n: (json.loads(a), c) for n, a, c in linhas}
+
+def _gravar_cache(resultados):
+    agora = time.time()
+    with closing(_abrir_cache()) as conn, conn:
+        conn.executemany(
+            """
+            INSERT INTO movimentacoes (numero, andamentos, consultado_em, alterado_em)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(numero) DO UPDATE SET
+                andamentos = excluded.andamentos,
+                consultado_em = excluded.consultado_em,
+                alterado_em = COALESCE(excluded.alterado_em, movimentacoes.alterado_em)
+            """,
+            [
+                (n, json.dumps(r["movimentacoes"], ensure_ascii=False), agora,
+                 agora if r["novas"] else None)
+                for n, r in resultados.items()
+            ],
+        )
+
+def consultar_movimentacoes_em_lote(numeros, max_concorrencia=None, ttl=None):
+    """
+    Consulta vários processos no ESAJ em paralelo (até `max_concorrencia` por vez,
+    respeitando ESAJ_REQUISICOES_POR_SEGUNDO), reaproveitando consultas com menos
+    de `ttl` segundos guardadas no cache local.
+    Retorna {numero: {"movimentacoes", "novas", "houve_movimentacao", "do_cache", "erro"}},
+    onde "novas" são os andamentos que não apareciam na consulta anterior.
+    """
+    numeros = list(dict.fromkeys(str(n) for n in numeros if n))
+    ttl = ESAJ_CACHE_TTL if ttl is None else ttl
+    cache = _ler_cache(numeros)
+    agora = time.time()
+
+    resultados = {}
+    pendentes = []
+    for n in numeros:
+        anteriores, consultado_em = cache.get(n, (None, 0))
+        em_cache = anteriores is not None and agora - consultado_em < ttl
+        metricas.registrar_cache("esaj", em_cache)
+        if em_cache:
+            resultados[n] = {"movimentacoes": anteriores, "novas": [],
+                             "houve_movimentacao": False, "do_cache": True, "erro": None}
+        else:
+            pendentes.append(n)
+
+    def consultar(n):
+        try:
+            return n, _buscar_movimentacoes(n), None
+        except Exception as e:
+            return n, None, str(e)
+
+    atualizados = {}
+    with ThreadPoolExecutor(max_workers=max_concorrencia or ESAJ_MAX_CONCORRENCIA) as pool:
+        for n, andamentos, erro in pool.map(consultar, pendentes):
+            if erro is not None:
+                anteriores = cache.get(n, ([], 0))[0]
+                resultados[n] = {"movimentacoes": anteriores, "novas": [],
+                                 "houve_movimentacao": False, "do_cache": True, "erro": erro}
+                continue
+            anteriores = cache.get(n, (None, 0))[0]
+            # Na primeira consulta não há base de comparação
+            novas = [] if anteriores is None else [a for a in andamentos if a not in anteriores]
+            atualizados[n] = resultados[n] = {
+                "movimentacoes": andamentos, "novas": novas,
+                "houve_movimentacao": bool(novas), "do_cache": False, "erro": None,
+            }
+    if atualizados:
+        _gravar_cache(atualizados)
+    return resultados
+
+def marcar_movimentacoes(processos, resultados):
+    """
+    Devolve cópias dos processos com houve_movimentacao=True para os que
+    tiveram andamentos novos em `resultados` (de consultar_movimentacoes_em_lote).
+    """
+    return [
+        {**p, "houve_movimentacao": True}
+        if resultados.get(str(p.get("numero")), {}).get("houve_movimentacao") else p
+        for p in processos
+    ]
@@ -0,0 +1,244 @@
+# servicos/fila_envios.py
+import os
+import json
+import time
+import uuid
+import random
+import threading
+from contextlib import closing
+from .armazenamento import conectar
+
+# Fila durável (SQLite) de envios ao GAS. O formulário grava aqui e retorna na
+# hora; uma thread em segundo plano drena a fila em lotes, com novas tentativas,
+# backoff exponencial e uma chave de idempotência por registro. Registros confirmados
+# perdem os dados na hora (podem conter senhas) e a linha, que só serve para contagens,
+# é apagada depois de FILA_RETENCAO_DIAS.
+
+FILA_TAMANHO_LOTE = int(os.getenv("FILA_TAMANHO_LOTE", "20"))
+FILA_MAX_TENTATIVAS = int(os.getenv("FILA_MAX_TENTATIVAS", "8"))
+FILA_BACKOFF_BASE = float(os.getenv("FILA_BACKOFF_BASE", "2"))
+FILA_BACKOFF_MAX = float(os.getenv("FILA_BACKOFF_MAX", "300"))
+FILA_RETENCAO_DIAS = float(os.getenv("FILA_RETENCAO_DIAS", "7"))
+# Intervalo mínimo entre duas limpezas feitas pelo worker (segundos)
+FILA_INTERVALO_LIMPEZA = 3600
+
+PENDENTE, ENVIANDO, ENVIADO, FALHOU = "pendente", "enviando", "enviado", "falhou"
+
+_lock = threading.Lock()
+_acordar = threading.Event()
+_worker = None
+_ultima_limpeza = 0.0
+
+def _abrir():
+    conn = conectar("fila_envios")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS envios (
+            id                TEXT PRIMARY KEY,
+            tipo              TEXT NOT NULL,
+            dados             TEXT NOT NULL,
+            status            TEXT NOT NULL,
+            tentativas        INTEGER NOT NULL DEFAULT 0,
+            proxima_tentativa REAL NOT NULL,
+            erro              TEXT,
+            criado_em         REAL NOT NULL,
+            enviado_em        REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_envios_status ON envios (status, proxima_tentativa)")
+    return conn
+
+def enfileirar(tipo, dados):
+    """
+    Grava o registro na fila e acorda o worker. Retorna a chave de idempotência.
+    """
+    chave = uuid.uuid4().hex
+    agora = time.time()
+    with closing(_abrir()) as conn, conn:
+        conn.execute(
+            "INSERT INTO envios (id, tipo, dados, status, proxima_tentativa, criado_em) VALUES (?, ?, ?, ?, ?, ?)",
+            (chave, tipo, json.dumps(dados, ensure_ascii=False, default=str), PENDENTE, agora, agora),
+        )
+    _acordar.set()
+    return chave
+
+def enfileirar_varios(tipo, registros, prefixo):
+    """
+    Grava vários registros numa única transação (importação em massa).
+    As chaves de idempotência começam com `prefixo`, que identifica o lote em andamento().
+    """
+    agora = time.time()
+    with closing(_abrir()) as conn, conn:
+        conn.executemany(
+            "INSERT INTO envios (id, tipo, dados, status, proxima_tentativa, criado_em) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (f"{prefixo}-{uuid.uuid4().hex}", tipo,
+                 json.dumps(dados, ensure_ascii=False, default=str), PENDENTE, agora, agora)
+                for dados in registros
+            ],
+        )
+    _acordar.set()
+    return len(registros)
+
+def enfileirado_em_massa(chave):
+    """
+    Se a chave de idempotência veio de enfileirar_varios (as de enfileirar são só hex).
+    """
+    return "-" in chave
+
+def andamento(prefixo):
+    """
+    Quantidade de envios por status dos registros gravados com enfileirar_varios(..., prefixo).
+    """
+    # Intervalo de chaves em vez de LIKE, para usar o índice da chave primária
+    # ("." é o caractere seguinte a "-")
+    with closing(_abrir()) as conn:
+        return dict(conn.execute(
+            "SELECT status, COUNT(*) FROM envios WHERE id > ? AND id < ? GROUP BY status",
+            (f"{prefixo}-", f"{prefixo}."),
+        ))
+
+def dados_pendentes(tipo):
+    """
+    Dados dos envios da aba `tipo` ainda não confirmados pelo GAS (pendentes, em envio ou com falha).
+    """
+    with closing(_abrir()) as conn:
+        return [
+            json.loads(d) for (d,) in conn.execute(
+                "SELECT dados FROM envios WHERE tipo = ? AND status != ?", (tipo, ENVIADO)
+            )
+        ]
+
+def resumo():
+    """
+    Quantidade de envios por status, ex.: {"pendente": 2, "falhou": 1}.
+    """
+    with closing(_abrir()) as conn:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM envios GROUP BY status"))
+
+def listar(status=None, limite=50):
+    """
+    Envios mais recentes (opcionalmente de um status), como lista de dicionários.
+    """
+    sql = "SELECT id, tipo, dados, status, tentativas, erro, criado_em FROM envios"
+    args = ()
+    if status:
+        sql += " WHERE status = ?"
+        args = (status,)
+    sql += " ORDER BY criado_em DESC LIMIT ?"
+    with closing(_abrir()) as conn:
+        linhas = conn.execute(sql, args + (limite,)).fetchall()
+    return [
+        {"id": i, "tipo": t, "dados": json.loads(d), "status": s,
+         "tentativas": n, "erro": e, "criado_em": c}
+        for i, t, d, s, n, e, c in linhas
+    ]
+
+def reenviar_falhas():
+    """
+    Devolve os envios que esgotaram as tentativas para a fila.
+    """
+    with closing(_abrir()) as conn, conn:
+        n = conn.execute(
+            "UPDATE envios SET status = ?, tentativas = 0, proxima_tentativa = ? WHERE status = ?",
+            (PENDENTE, time.time(), FALHOU),
+        ).rowcount
+    _acordar.set()
+    return n
+
+def _reservar_lote():
+    with closing(_abrir()) as conn, conn:
+        linhas = conn.execute(
+            """
+            SELECT id, tipo, dados, tentativas FROM envios
+            WHERE status = ? AND proxima_tentativa <= ?
+            ORDER BY criado_em LIMIT ?
+            """,
+            (PENDENTE, time.time(), FILA_TAMANHO_LOTE),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE envios SET status = ? WHERE id = ?", [(ENVIANDO, l[0]) for l in linhas]
+        )
+    return [
+        {"id": i, "tipo": t, "dados": json.loads(d), "tentativas": n}
+        for i, t, d, n in linhas
+    ]
+
+def _proxima_espera():
+    with closing(_abrir()) as conn:
+        proxima = conn.execute(
+            "SELECT MIN(proxima_tentativa) FROM envios WHERE status = ?", (PENDENTE,)
+        ).fetchone()[0]
+    if proxima is None:
+        return None
+    return max(0.0, proxima - time.time())
+
+def _registrar_resultado(lote, erros):
+    agora = time.time()
+    with closing(_abrir()) as conn, conn:
+        for item in lote:
+            erro = erros.get(item["id"])
+            if erro is None:
+                conn.execute(
+                    "UPDATE envios SET status = ?, dados = '{}', erro = NULL, enviado_em = ? WHERE id = ?",
+                    (ENVIADO, agora, item["id"]),
+                )
+                continue
+            tentativas = item["tentativas"] + 1
+            espera = min(FILA_BACKOFF_MAX, FILA_BACKOFF_BASE * 2 ** (tentativas - 1))
+            espera *= random.uniform(0.5, 1.5)
+            status = FALHOU if tentativas >= FILA_MAX_TENTATIVAS else PENDENTE
+            conn.execute(
+                "UPDATE envios SET status = ?, tentativas = ?, proxima_tentativa = ?, erro = ? WHERE id = ?",
+                (status, tentativas, agora + espera, str(erro)[:500], item["id"]),
+            )
+
+def limpar_enviados(retencao_dias=FILA_RETENCAO_DIAS):
+    """
+    Apaga os envios confirmados há mais de `retencao_dias` e esvazia os dados dos
+    demais confirmados (linhas gravadas antes de os dados serem descartados no envio).
+    Retorna quantas linhas foram apagadas.
+    """
+    global _ultima_limpeza
+    _ultima_limpeza = time.time()
+    with closing(_abrir()) as conn, conn:
+        apagadas = conn.execute(
+            "DELETE FROM envios WHERE status = ? AND enviado_em < ?",
+            (ENVIADO, _ultima_limpeza - retencao_dias * 86400),
+        ).rowcount
+        conn.execute("UPDATE envios SET dados = '{}' WHERE status = ? AND dados != '{}'", (ENVIADO,))
+    return apagadas
+
+def _drenar(enviar_lote):
+    while True:
+        if time.time() - _ultima_limpeza >= FILA_INTERVALO_LIMPEZA:
+            limpar_enviados()
+        lote = _reservar_lote()
+        if lote:
+            try:
+                erros = enviar_lote(lote) or {}
+            except Exception as e:
+                erros = {item["id"]: e for item in lote}
+            _registrar_resultado(lote, erros)
+            continue
+        espera = _proxima_espera()
+        limpeza = max(0.0, _ultima_limpeza + FILA_INTERVALO_LIMPEZA - time.time())
+        _acordar.wait(timeout=limpeza if espera is None else min(espera, limpeza))
+        _acordar.clear()
+
+def iniciar_worker(enviar_lote):
+    """
+    Sobe (uma única vez por processo) a thread que drena a fila.
+    `enviar_lote(itens)` recebe dicionários com "id", "tipo" e "dados" e devolve
+    {id: erro} dos itens não confirmados; se levantar exceção, o lote todo falhou.
+    """
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        # Registros que ficaram "enviando" quando o processo caiu voltam para a fila
+        with closing(_abrir()) as conn, conn:
+            conn.execute("UPDATE envios SET status = ? WHERE status = ?", (PENDENTE, ENVIANDO))
+        _worker = threading.Thread(
+            target=_drenar, args=(enviar_lote,), name="fila-envios", daemon=True
+        )
+        _worker.start()
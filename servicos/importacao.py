@@ -0,0 +1,228 @@
+# servicos/importacao.py
+import io
+import os
+import csv
+import uuid
+import datetime
+import unicodedata
+from collections import namedtuple
+import pandas as pd
+from . import metricas
+from .armazem import COLUNAS_CLIENTE, COLUNAS_PROCESSO, obter_armazem
+from .planilhas import enfileirar_varios_para_planilha
+
+# Importação em massa de clientes e processos a partir de CSV/XLSX. O arquivo é lido
+# em blocos (sem carregar tudo na memória), cada bloco é validado por colunas inteiras,
+# as duplicatas (contra a planilha e dentro do próprio arquivo) saem por um índice de
+# hash das chaves, e as linhas válidas vão para a fila de envios numa única transação
+# por bloco. O envio ao GAS segue em segundo plano pela fila: um registro por POST ou,
+# se o script do GAS aceitar lotes (GAS_ENVIO_EM_LOTE=massa ou 1), FILA_TAMANHO_LOTE.
+
+IMPORTACAO_TAMANHO_BLOCO = int(os.getenv("IMPORTACAO_TAMANHO_BLOCO", "5000"))
+# Erros de validação guardados para exibição (os demais só entram na contagem)
+IMPORTACAO_MAX_ERROS = 1000
+
+# Por aba: colunas gravadas, obrigatórias e a chave usada para deduplicar
+COLUNAS = {"Cliente": COLUNAS_CLIENTE, "Processo": COLUNAS_PROCESSO}
+OBRIGATORIOS = {
+    "Cliente":  ["nome", "email", "telefone", "endereco"],
+    "Processo": ["cliente", "numero", "descricao"],
+}
+CHAVE = {"Cliente": "email", "Processo": "numero"}
+COLUNAS_DATA = ["aniversario", "prazo_inicial", "prazo"]
+COLUNAS_VALOR = ["valor_total", "valor_movimentado"]
+COLUNAS_BOOLEANAS = ["houve_movimentacao", "encerrado"]
+VERDADEIROS = {"sim", "s", "true", "verdadeiro", "1", "x"}
+# Cabeçalhos alternativos (já normalizados) -> coluna
+SINONIMOS = {"e_mail": "email", "numero_do_processo": "numero", "data_de_nascimento": "aniversario"}
+
+_EMAIL = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+ResultadoImportacao = namedtuple(
+    "ResultadoImportacao", ["prefixo", "lidas", "importadas", "duplicadas", "invalidas", "erros"]
+)
+
+def _normalizar_cabecalho(nome):
+    # "E-mail " -> "e_mail", "Número do Processo" -> "numero_do_processo"
+    sem_acento = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    normalizado = "_".join(sem_acento.strip().lower().replace("-", " ").split())
+    return SINONIMOS.get(normalizado, normalizado)
+
+def _texto_da_celula(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime.datetime) and valor.time() == datetime.time():
+        return valor.date().isoformat()
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _blocos_csv(arquivo, tamanho_bloco):
+    # Codificação e separador deduzidos do começo do arquivo
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    fim = amostra.rfind(b"\n")
+    amostra = amostra[:fim + 1] if fim >= 0 else amostra
+    try:
+        texto = amostra.decode("utf-8")
+        codificacao = "utf-8-sig"
+    except UnicodeDecodeError:
+        texto = amostra.decode("latin-1")
+        codificacao = "latin-1"
+    try:
+        separador = csv.Sniffer().sniff(texto, delimiters=",;\t").delimiter
+    except csv.Error:
+        separador = ","
+    leitor = io.TextIOWrapper(arquivo, encoding=codificacao, newline="")
+    try:
+        yield from pd.read_csv(
+            leitor, sep=separador, dtype=str, keep_default_na=False, chunksize=tamanho_bloco
+        )
+    finally:
+        leitor.detach()  # sem fechar o arquivo recebido
+
+def _blocos_xlsx(arquivo, tamanho_bloco):
+    from openpyxl import load_workbook
+    # read_only: as linhas são lidas do XML sob demanda
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = [_texto_da_celula(c) for c in next(linhas, ())]
+        bloco = []
+        for linha in linhas:
+            bloco.append([_texto_da_celula(c) for c in linha[:len(cabecalho)]])
+            if len(bloco) == tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        livro.close()
+
+def ler_em_blocos(arquivo, nome, tamanho_bloco=IMPORTACAO_TAMANHO_BLOCO):
+    """
+    Gera DataFrames de texto com até `tamanho_bloco` linhas do CSV/XLSX `arquivo`
+    (objeto binário), com cabeçalhos normalizados e índice = linha no arquivo.
+    """
+    leitor = _blocos_xlsx if nome.lower().endswith(".xlsx") else _blocos_csv
+    inicio = 2  # a linha 1 é o cabeçalho
+    for bloco in leitor(arquivo, tamanho_bloco):
+        bloco.columns = [_normalizar_cabecalho(c) for c in bloco.columns]
+        bloco = bloco.loc[:, ~bloco.columns.duplicated()].fillna("")
+        bloco.index = range(inicio, inicio + len(bloco))
+        inicio += len(bloco)
+        # Linhas totalmente vazias (comuns no fim de planilhas) são ignoradas
+        yield bloco[(bloco.apply(lambda c: c.str.strip()) != "").any(axis=1)]
+
+def _datas(valores):
+    # AAAA-MM-DD ou DD/MM/AAAA -> AAAA-MM-DD; inválidas viram NaT
+    valores = valores.str.strip().str[:10]
+    iso = pd.to_datetime(valores, format="%Y-%m-%d", errors="coerce")
+    br = pd.to_datetime(valores, format="%d/%m/%Y", errors="coerce")
+    return iso.fillna(br)
+
+def _valores(valores):
+    # Aceita "1234.5" e "1.234,50"; vazio é zero
+    valores = valores.str.strip().str.replace("R$", "", regex=False).str.strip()
+    brasileiro = valores.str.contains(",", regex=False)
+    valores = valores.where(
+        ~brasileiro, valores.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(valores.replace("", "0"), errors="coerce")
+
+def validar_bloco(tipo, bloco):
+    """
+    Valida e normaliza um bloco de uma vez por coluna. Retorna (válidas, erros), com
+    `válidas` nas colunas de COLUNAS[tipo] e `erros` uma Series {linha: motivos}.
+    """
+    bloco = bloco.reindex(columns=COLUNAS[tipo], fill_value="")
+    motivos = pd.Series("", index=bloco.index)
+
+    def marcar(mascara, motivo):
+        nonlocal motivos
+        motivos = motivos.where(~mascara, motivos + motivo + "; ")
+
+    for campo in OBRIGATORIOS[tipo]:
+        bloco[campo] = bloco[campo].str.strip()
+        marcar(bloco[campo] == "", f"{campo} vazio")
+    if tipo == "Cliente":
+        marcar((bloco["email"] != "") & ~bloco["email"].str.match(_EMAIL), "email inválido")
+    for campo in COLUNAS_DATA:
+        if campo in bloco:
+            preenchido = bloco[campo].str.strip() != ""
+            datas = _datas(bloco[campo])
+            marcar(preenchido & datas.isna(), f"{campo} inválido")
+            bloco[campo] = datas.dt.strftime("%Y-%m-%d").fillna("")
+    for campo in COLUNAS_VALOR:
+        if campo in bloco:
+            valores = _valores(bloco[campo])
+            marcar(valores.isna() | (valores < 0), f"{campo} inválido")
+            bloco[campo] = valores.fillna(0.0)
+    for campo in COLUNAS_BOOLEANAS:
+        if campo in bloco:
+            bloco[campo] = bloco[campo].str.strip().str.lower().isin(VERDADEIROS)
+
+    invalidas = motivos != ""
+    return bloco[~invalidas], motivos[invalidas].str.rstrip("; ")
+
+def _chaves_existentes(tipo):
+    # Índice de hash (set) das chaves já cadastradas, normalizadas
+    armazem = obter_armazem()
+    df = armazem.clientes if tipo == "Cliente" else armazem.processos
+    coluna = CHAVE[tipo]
+    if coluna not in df.columns:
+        return set()
+    return set(df[coluna].astype(str).str.strip().str.lower())
+
+def importar(tipo, arquivo, nome, responsavel, escritorio="", progresso=None,
+             tamanho_bloco=IMPORTACAO_TAMANHO_BLOCO):
+    """
+    Importa o CSV/XLSX `arquivo` para a aba `tipo` ("Cliente" ou "Processo").
+    Linhas com chave (email/numero) já cadastrada ou repetida no arquivo são ignoradas;
+    colunas ausentes ficam vazias, `responsavel`/`escritorio` vazios recebem os valores dados.
+    `progresso(fração, texto)` é chamado a cada bloco.
+    Retorna ResultadoImportacao; o envio ao GAS segue em segundo plano
+    (acompanhe com fila_envios.andamento(resultado.prefixo)).
+    """
+    prefixo = f"importacao-{uuid.uuid4().hex[:12]}"
+    coluna_chave = CHAVE[tipo]
+    coluna_cadastro = "cadastro" if tipo == "Cliente" else "data_cadastro"
+    vistas = _chaves_existentes(tipo)
+    arquivo.seek(0, io.SEEK_END)
+    tamanho = arquivo.tell() or 1
+    arquivo.seek(0)
+
+    lidas = importadas = duplicadas = invalidas = 0
+    erros = []
+    with metricas.medir("importacao", tipo=tipo):
+        for bloco in ler_em_blocos(arquivo, nome, tamanho_bloco):
+            lidas += len(bloco)
+            validas, motivos = validar_bloco(tipo, bloco)
+            invalidas += len(motivos)
+            erros.extend(list(motivos.items())[:IMPORTACAO_MAX_ERROS - len(erros)])
+
+            chaves = validas[coluna_chave].str.lower()
+            repetidas = chaves.isin(vistas) | chaves.duplicated()
+            duplicadas += int(repetidas.sum())
+            validas = validas[~repetidas]
+            vistas.update(chaves[~repetidas])
+
+            agora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            validas = validas.assign(**{coluna_cadastro: agora})
+            validas["responsavel"] = validas["responsavel"].where(validas["responsavel"] != "", responsavel)
+            if "escritorio" in validas:
+                validas["escritorio"] = validas["escritorio"].where(validas["escritorio"] != "", escritorio)
+            importadas += enfileirar_varios_para_planilha(tipo, validas.to_dict("records"), prefixo)
+
+            if progresso is not None:
+                # Posição no arquivo: aproximada (leitura bufferizada no CSV, zip no XLSX)
+                fracao = min(arquivo.tell() / tamanho, 1.0)
+                progresso(fracao, f"{lidas} linhas lidas, {importadas} na fila de envio")
+    metricas.contar("importacao_linhas", importadas, tipo=tipo, resultado="importada")
+    metricas.contar("importacao_linhas", duplicadas, tipo=tipo, resultado="duplicada")
+    metricas.contar("importacao_linhas", invalidas, tipo=tipo, resultado="invalida")
+    if progresso is not None:
+        progresso(1.0, f"{lidas} linhas lidas, {importadas} na fila de envio")
+    return ResultadoImportacao(prefixo, lidas, importadas, duplicadas, invalidas, erros)
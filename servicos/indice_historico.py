@@ -0,0 +1,142 @@
+# servicos/indice_historico.py
+import re
+import math
+import threading
+import unicodedata
+from array import array
+from collections import defaultdict, Counter
+import numpy as np
+import streamlit as st
+from .armazem import obter_armazem
+from . import replica
+from .replica import chave_da_linha
+
+# Índices em memória sobre Historico_Peticao: hash por número do processo e
+# índice invertido (BM25) sobre conteudo, tipo e cliente_associado. Os registros
+# guardam só os cabeçalhos; o conteúdo é lido da réplica apenas para indexar.
+
+# Peso de cada campo na busca (quantas vezes seus termos são contados)
+PESOS_CAMPOS = {"conteudo": 1, "tipo": 2, "cliente_associado": 2}
+PALAVRAS_VAZIAS = {
+    "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas", "um", "uma",
+    "que", "com", "por", "para", "ao", "aos", "as", "os", "se", "ou", "e", "o", "a",
+}
+_PALAVRA = re.compile(r"\w+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def termos(texto):
+    """
+    Quebra o texto em termos minúsculos e sem acentos, descartando palavras vazias.
+    """
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    texto = texto.encode("ascii", "ignore").decode("ascii")
+    return [t for t in _PALAVRA.findall(texto) if t not in PALAVRAS_VAZIAS]
+
+class IndiceHistorico:
+    """
+    Índice incremental: adicionar() só processa as linhas ainda não vistas.
+    Cada termo guarda arrays compactos (documentos, frequências) que crescem só
+    no fim, o que permite pontuar uma consulta inteira com NumPy sem cópias.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.limpar()
+
+    def limpar(self):
+        """
+        Esvazia o índice, mantendo o mesmo lock (chame com self.lock adquirido).
+        """
+        self.registros = []
+        self.chaves = {}
+        self.por_numero = defaultdict(list)
+        self.invertido = defaultdict(lambda: (array("i"), array("f")))
+        self.tamanhos = array("f")
+        self.total_termos = 0
+        self.geracao = None  # geração do armazém já indexada
+
+    def adicionar(self, linhas, conteudos=None):
+        """
+        Indexa as linhas novas. `conteudos` ({chave: texto}) traz o texto das petições,
+        que entra no índice mas não fica guardado nos registros.
+        """
+        conteudos = conteudos or {}
+        with self.lock:
+            for linha in linhas:
+                chave = chave_da_linha("Historico_Peticao", linha)
+                if chave in self.chaves:
+                    continue
+                doc = len(self.registros)
+                self.registros.append(linha)
+                self.chaves[chave] = doc
+                self.por_numero[str(linha.get("numero", ""))].append(doc)
+                frequencias = Counter()
+                for campo, peso in PESOS_CAMPOS.items():
+                    valor = conteudos.get(chave, linha.get(campo)) if campo == "conteudo" else linha.get(campo)
+                    contagem = Counter(termos(valor))
+                    frequencias.update({t: f * peso for t, f in contagem.items()})
+                for t, f in frequencias.items():
+                    docs, freqs = self.invertido[t]
+                    docs.append(doc)
+                    freqs.append(f)
+                tamanho = sum(frequencias.values())
+                self.tamanhos.append(tamanho)
+                self.total_termos += tamanho
+
+    def por_processo(self, numero):
+        """
+        Registros do processo `numero`, na ordem em que chegaram.
+        """
+        return [self.registros[d] for d in self.por_numero.get(str(numero), [])]
+
+    def buscar(self, consulta, limite=20):
+        """
+        Busca por relevância (BM25). Retorna lista de (pontuação, registro), da mais relevante.
+        """
+        with self.lock:
+            n = len(self.registros)
+            if not n:
+                return []
+            tamanhos = np.frombuffer(self.tamanhos, dtype=np.float32)
+            media = self.total_termos / n or 1
+            pontos = np.zeros(n)
+            for t in set(termos(consulta)):
+                if t not in self.invertido:
+                    continue
+                docs, freqs = self.invertido[t]
+                docs = np.frombuffer(docs, dtype=np.int32)
+                freqs = np.frombuffer(freqs, dtype=np.float32)
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                norma = BM25_K1 * (1 - BM25_B + BM25_B * tamanhos[docs] / media)
+                # Cada documento aparece uma única vez por termo, então a soma indexada é segura
+                pontos[docs] += idf * freqs * (BM25_K1 + 1) / (freqs + norma)
+            candidatos = np.flatnonzero(pontos)
+            if len(candidatos) > limite:
+                candidatos = candidatos[np.argpartition(pontos[candidatos], -limite)[-limite:]]
+            candidatos = candidatos[np.argsort(-pontos[candidatos], kind="stable")]
+            return [(float(pontos[d]), self.registros[d]) for d in candidatos]
+
+@st.cache_resource(show_spinner=False)
+def _indice():
+    return IndiceHistorico()
+
+def obter_indice_historico():
+    """
+    Devolve o índice compartilhado, acrescentando as linhas novas do armazém
+    sempre que ele é remontado (ou reconstruindo-o se alguma linha sumiu da planilha).
+    """
+    armazem = obter_armazem()
+    indice = _indice()
+    if indice.geracao == armazem.geracao:
+        return indice
+    with indice.lock:
+        if indice.geracao != armazem.geracao:
+            linhas = armazem.historico[list(armazem.historico.columns.drop("data_valor"))].to_dict("records")
+            atuais = {chave_da_linha("Historico_Peticao", l) for l in linhas}
+            if not atuais.issuperset(indice.chaves):
+                indice.limpar()
+            # Só o texto das petições ainda não indexadas é lido (e descomprimido)
+            conteudos = replica.ler_corpos("Historico_Peticao", atuais.difference(indice.chaves))
+            indice.adicionar(linhas, conteudos)
+            indice.geracao = armazem.geracao
+    return indice
@@ -0,0 +1,203 @@
+# servicos/indice_prazos.py
+import datetime
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+import streamlit as st
+from utils.helpers import dia_do_prazo
+from .armazem import obter_armazem
+from .replica import chave_da_linha
+
+# Índice de prazos dos processos em andamento: listas ordenadas de (dia, chave),
+# uma geral e uma por responsável e por escritório. "Vence nos próximos N dias",
+# "atrasados" e a agenda de cada advogado saem por busca binária, sem percorrer a
+# carteira nem recalcular o status de cada processo.
+
+CAMPOS_PRAZO = [
+    "numero", "cliente", "area", "escritorio", "responsavel", "prazo",
+    "houve_movimentacao", "encerrado",
+]
+# Acima desta fração de linhas alteradas, reordenar tudo sai mais barato que inserir uma a uma
+FRACAO_RECONSTRUCAO = 0.125
+
+class IndicePrazos:
+    """
+    Índice incremental: atualizar() só mexe nas linhas novas, alteradas ou removidas.
+    Processos encerrados ou sem prazo válido não entram.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.geracao = None  # geração do armazém já aplicada
+        self.registros = {}      # chave -> processo (CAMPOS_PRAZO)
+        self.assinaturas = {}    # chave -> tupla dos campos, para detectar alterações
+        self.entradas = {}       # chave -> (dia, responsavel, escritorio) das listas abaixo
+        self.todos = []
+        self.por_responsavel = defaultdict(list)
+        self.por_escritorio = defaultdict(list)
+
+    def _listas(self, responsavel, escritorio):
+        return (self.todos, self.por_responsavel[responsavel], self.por_escritorio[escritorio])
+
+    def _tirar(self, chave):
+        entrada = self.entradas.pop(chave, None)
+        if entrada is None:
+            return
+        dia, responsavel, escritorio = entrada
+        for lista in self._listas(responsavel, escritorio):
+            i = bisect_left(lista, (dia, chave))
+            if i < len(lista) and lista[i] == (dia, chave):
+                del lista[i]
+
+    def _por(self, chave, processo, ordenar=True):
+        # Prazo vazio ou inválido: processo fica fora do índice
+        dia = dia_do_prazo(processo.get("prazo"))
+        if dia is None or bool(processo.get("encerrado")):
+            return
+        responsavel = str(processo.get("responsavel") or "")
+        escritorio = str(processo.get("escritorio") or "")
+        self.entradas[chave] = (dia, responsavel, escritorio)
+        for lista in self._listas(responsavel, escritorio):
+            if ordenar:
+                insort(lista, (dia, chave))
+            else:
+                lista.append((dia, chave))
+
+    def _reordenar(self):
+        self.todos.sort()
+        for grupo in (self.por_responsavel, self.por_escritorio):
+            for lista in grupo.values():
+                lista.sort()
+
+    def atualizar(self, processos):
+        """
+        Sincroniza o índice com a lista completa de processos: inclui os novos,
+        reposiciona os alterados (prazo, responsável, encerramento...) e tira os que sumiram.
+        """
+        with self.lock:
+            vistos = set()
+            alterados = []
+            for processo in processos:
+                chave = chave_da_linha("Processo", processo)
+                vistos.add(chave)
+                assinatura = tuple(str(processo.get(c, "")) for c in CAMPOS_PRAZO)
+                if self.assinaturas.get(chave) != assinatura:
+                    alterados.append((chave, assinatura, processo))
+            removidos = self.assinaturas.keys() - vistos
+
+            if len(alterados) + len(removidos) > FRACAO_RECONSTRUCAO * max(len(self.assinaturas), 1):
+                for chave in removidos:
+                    del self.assinaturas[chave], self.registros[chave]
+                for chave, assinatura, processo in alterados:
+                    self.assinaturas[chave] = assinatura
+                    self.registros[chave] = {c: processo.get(c, "") for c in CAMPOS_PRAZO}
+                self.entradas.clear()
+                self.todos.clear()
+                self.por_responsavel.clear()
+                self.por_escritorio.clear()
+                for chave, processo in self.registros.items():
+                    self._por(chave, processo, ordenar=False)
+                self._reordenar()
+                return
+
+            for chave in removidos:
+                self._tirar(chave)
+                del self.assinaturas[chave], self.registros[chave]
+            for chave, assinatura, processo in alterados:
+                self._tirar(chave)
+                self.assinaturas[chave] = assinatura
+                self.registros[chave] = {c: processo.get(c, "") for c in CAMPOS_PRAZO}
+                self._por(chave, self.registros[chave])
+
+    def _lista(self, responsavel, escritorio):
+        # Usa o balde mais específico; o outro filtro é aplicado só no intervalo encontrado
+        if responsavel is not None:
+            return self.por_responsavel.get(str(responsavel), [])
+        if escritorio is not None:
+            return self.por_escritorio.get(str(escritorio), [])
+        return self.todos
+
+    def intervalo(self, inicio=None, fim=None, responsavel=None, escritorio=None):
+        """
+        Processos com prazo entre `inicio` e `fim` (datas, inclusive; None = sem limite),
+        do prazo mais antigo para o mais novo, opcionalmente de um responsável e/ou escritório.
+        """
+        with self.lock:
+            lista = self._lista(responsavel, escritorio)
+            i = 0 if inicio is None else bisect_left(lista, (inicio.toordinal(),))
+            j = len(lista) if fim is None else bisect_left(lista, (fim.toordinal() + 1,))
+            resultado = [self.registros[chave] for _, chave in lista[i:j]]
+        if responsavel is not None and escritorio is not None:
+            resultado = [p for p in resultado if str(p.get("escritorio") or "") == str(escritorio)]
+        return resultado
+
+    def atrasados(self, hoje=None, responsavel=None, escritorio=None):
+        """
+        Processos em andamento com prazo anterior a hoje.
+        """
+        hoje = hoje or datetime.date.today()
+        return self.intervalo(None, hoje - datetime.timedelta(days=1), responsavel, escritorio)
+
+    def vencendo(self, dias, hoje=None, responsavel=None, escritorio=None):
+        """
+        Processos em andamento com prazo de hoje até daqui a `dias` dias.
+        """
+        hoje = hoje or datetime.date.today()
+        return self.intervalo(hoje, hoje + datetime.timedelta(days=dias), responsavel, escritorio)
+
+    def agenda(self, responsavel, dias=None, hoje=None):
+        """
+        Agenda de um advogado: atrasados e, depois, os prazos até daqui a `dias`
+        dias (todos, se None), em ordem de vencimento.
+        """
+        hoje = hoje or datetime.date.today()
+        fim = None if dias is None else hoje + datetime.timedelta(days=dias)
+        return self.intervalo(None, fim, responsavel)
+
+    def resumo_por_responsavel(self, dias, hoje=None):
+        """
+        {responsável: (atrasados, vencendo em até `dias` dias)}, só com contagens
+        por busca binária em cada balde.
+        """
+        hoje = (hoje or datetime.date.today()).toordinal()
+        with self.lock:
+            resumo = {}
+            for responsavel, lista in self.por_responsavel.items():
+                inicio = bisect_left(lista, (hoje,))
+                fim = bisect_left(lista, (hoje + dias + 1,))
+                if inicio or fim > inicio:
+                    resumo[responsavel] = (inicio, fim - inicio)
+            return resumo
+
+    def responsaveis(self):
+        """
+        Responsáveis com algum prazo em aberto.
+        """
+        with self.lock:
+            return sorted(r for r, lista in self.por_responsavel.items() if lista)
+
+    def escritorios(self):
+        """
+        Escritórios com algum prazo em aberto.
+        """
+        with self.lock:
+            return sorted(e for e, lista in self.por_escritorio.items() if lista)
+
+@st.cache_resource(show_spinner=False)
+def _indice():
+    return IndicePrazos()
+
+def obter_indice_prazos():
+    """
+    Devolve o índice compartilhado, aplicando só as diferenças sempre que o armazém é remontado.
+    """
+    armazem = obter_armazem()
+    indice = _indice()
+    if indice.geracao == armazem.geracao:
+        return indice
+    with indice.lock:
+        if indice.geracao != armazem.geracao:
+            processos = armazem.processos
+            colunas = [c for c in CAMPOS_PRAZO + ["id"] if c in processos.columns]
+            indice.atualizar(processos[colunas].to_dict("records"))
+            indice.geracao = armazem.geracao
+    return indice
@@ -0,0 +1,174 @@
+# servicos/metricas.py
+import time
+import threading
+from contextlib import contextmanager
+
+# Métricas do processo (compartilhadas por todas as sessões), só em memória.
+PREFIXO_PROMETHEUS = "juridico"
+
+# Limites superiores dos baldes dos histogramas
+BALDES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+BALDES_BYTES = (1024, 10 * 1024, 100 * 1024, 1024**2, 10 * 1024**2, 100 * 1024**2)
+
+_lock = threading.Lock()
+_histogramas = {}  # (nome, rótulos) -> [contagens por balde + infinito, soma, máximo, baldes]
+_contadores = {}   # (nome, rótulos) -> valor
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items() if v is not None))
+
+def observar(nome, valor, baldes=BALDES_MS, **rotulos):
+    """
+    Registra `valor` no histograma `nome` com os rótulos dados.
+    """
+    chave = _chave(nome, rotulos)
+    with _lock:
+        h = _histogramas.get(chave)
+        if h is None:
+            h = _histogramas[chave] = [[0] * (len(baldes) + 1), 0.0, 0.0, baldes]
+        i = next((i for i, limite in enumerate(baldes) if valor <= limite), len(baldes))
+        h[0][i] += 1
+        h[1] += valor
+        h[2] = max(h[2], valor)
+
+def contar(nome, valor=1, **rotulos):
+    """
+    Soma `valor` ao contador `nome` com os rótulos dados.
+    """
+    chave = _chave(nome, rotulos)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+def registrar_payload(operacao, tamanho, direcao="resposta", **rotulos):
+    """
+    Tamanho em bytes de um payload enviado ("envio") ou recebido ("resposta").
+    """
+    observar("payload_bytes", tamanho, BALDES_BYTES, operacao=operacao, direcao=direcao, **rotulos)
+
+def registrar_cache(cache, acerto):
+    """
+    Conta uma consulta ao cache `cache` e, se não foi acerto, uma falha.
+    """
+    contar("cache_consultas", cache=cache)
+    if not acerto:
+        contar("cache_falhas", cache=cache)
+
+@contextmanager
+def medir(operacao, **rotulos):
+    """
+    Span: mede o bloco em ms no histograma "latencia_ms" e conta em "erros" as
+    exceções que o atravessam (o rerun/stop do Streamlit não é erro).
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        contar("erros", operacao=operacao, erro=type(e).__name__, **rotulos)
+        raise
+    finally:
+        observar("latencia_ms", (time.perf_counter() - inicio) * 1000, operacao=operacao, **rotulos)
+
+def medir_blocos(blocos, operacao, **rotulos):
+    """
+    Repassa um gerador de blocos de bytes medindo o tempo até o fim e o total gerado.
+    """
+    total = 0
+    with medir(operacao, **rotulos):
+        for bloco in blocos:
+            total += len(bloco)
+            yield bloco
+    registrar_payload(operacao, total, **rotulos)
+
+def _percentil(contagens, baldes, q):
+    # Estimativa pelo limite superior do balde onde cai o percentil
+    alvo = q * sum(contagens)
+    acumulado = 0
+    for i, n in enumerate(contagens):
+        acumulado += n
+        if acumulado >= alvo and n:
+            return baldes[i] if i < len(baldes) else float("inf")
+    return 0.0
+
+def resumo_histogramas(nome):
+    """
+    Lista de dicionários (rótulos, chamadas, média, p50, p95, máximo) do histograma `nome`.
+    """
+    with _lock:
+        itens = [(k, [list(h[0]), h[1], h[2], h[3]]) for k, h in _histogramas.items() if k[0] == nome]
+    linhas = []
+    for (_, rotulos), (contagens, soma, maximo, baldes) in sorted(itens):
+        chamadas = sum(contagens)
+        linhas.append({
+            **dict(rotulos),
+            "chamadas": chamadas,
+            "media": soma / chamadas if chamadas else 0.0,
+            "p50": _percentil(contagens, baldes, 0.5),
+            "p95": _percentil(contagens, baldes, 0.95),
+            "maximo": maximo,
+        })
+    return linhas
+
+def resumo_contadores(nome):
+    """
+    Lista de dicionários (rótulos + valor) do contador `nome`.
+    """
+    with _lock:
+        itens = sorted((k, v) for k, v in _contadores.items() if k[0] == nome)
+    return [{**dict(rotulos), "valor": valor} for (_, rotulos), valor in itens]
+
+def taxas_de_acerto():
+    """
+    {cache: (consultas, acertos, taxa de acerto)} a partir dos contadores de cache.
+    """
+    consultas = {l["cache"]: l["valor"] for l in resumo_contadores("cache_consultas")}
+    falhas = {l["cache"]: l["valor"] for l in resumo_contadores("cache_falhas")}
+    return {
+        cache: (n, n - falhas.get(cache, 0), (n - falhas.get(cache, 0)) / n if n else 0.0)
+        for cache, n in consultas.items()
+    }
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _rotulos_prometheus(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+def exportar_prometheus():
+    """
+    Todas as métricas no formato de texto de exposição do Prometheus.
+    """
+    with _lock:
+        histogramas = {k: (list(h[0]), h[1], h[3]) for k, h in _histogramas.items()}
+        contadores = dict(_contadores)
+
+    linhas = []
+    for nome in sorted({k[0] for k in histogramas}):
+        metrica = f"{PREFIXO_PROMETHEUS}_{nome}"
+        linhas.append(f"# TYPE {metrica} histogram")
+        for (n, rotulos), (contagens, soma, baldes) in sorted(histogramas.items()):
+            if n != nome:
+                continue
+            acumulado = 0
+            for limite, quantidade in zip(list(baldes) + ["+Inf"], contagens):
+                acumulado += quantidade
+                linhas.append(f"{metrica}_bucket{_rotulos_prometheus(rotulos, [('le', limite)])} {acumulado}")
+            linhas.append(f"{metrica}_sum{_rotulos_prometheus(rotulos)} {soma:.3f}")
+            linhas.append(f"{metrica}_count{_rotulos_prometheus(rotulos)} {acumulado}")
+    for nome in sorted({k[0] for k in contadores}):
+        metrica = f"{PREFIXO_PROMETHEUS}_{nome}_total"
+        linhas.append(f"# TYPE {metrica} counter")
+        for (n, rotulos), valor in sorted(contadores.items()):
+            if n == nome:
+                linhas.append(f"{metrica}{_rotulos_prometheus(rotulos)} {valor}")
+    return "\n".join(linhas) + "\n"
+
+def zerar():
+    """
+    Descarta todas as métricas coletadas até agora.
+    """
+    with _lock:
+        _histogramas.clear()
+        _contadores.clear()
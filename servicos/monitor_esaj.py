@@ -0,0 +1,310 @@
+# servicos/monitor_esaj.py
+import os
+import time
+import heapq
+import random
+import datetime
+import threading
+from collections import deque
+from contextlib import closing
+from urllib.parse import urlsplit
+from utils.helpers import dia_do_prazo
+from .armazenamento import conectar
+from . import metricas, replica
+
+# Monitoramento do ESAJ em segundo plano: uma fila de prioridade com os processos em
+# andamento da aba Processo, em que cada um tem a hora da próxima consulta. Quanto mais
+# perto (ou mais vencido) o prazo, menor o intervalo entre consultas; entre processos já
+# vencidos, sai primeiro o de prazo mais próximo. As consultas respeitam um orçamento
+# de requisições por host e, em caso de erro, esperam com backoff exponencial e jitter.
+# O estado fica no banco local do ESAJ e sobrevive a reinícios.
+
+# Com "1", app.py sobe a thread de monitoramento (desligado por padrão: consulta um site externo)
+ESAJ_MONITORAMENTO = os.getenv("ESAJ_MONITORAMENTO", "0") == "1"
+# Máximo de consultas por host numa janela de uma hora (além do limite por segundo do esaj.py)
+ESAJ_ORCAMENTO_POR_HORA = int(os.getenv("ESAJ_ORCAMENTO_POR_HORA", "600"))
+ESAJ_BACKOFF_BASE = float(os.getenv("ESAJ_BACKOFF_BASE", "60"))
+ESAJ_BACKOFF_MAX = float(os.getenv("ESAJ_BACKOFF_MAX", "21600"))
+# A lista de processos é relida da réplica local a cada tantos segundos
+ESAJ_INTERVALO_SINCRONIZACAO = float(os.getenv("ESAJ_INTERVALO_SINCRONIZACAO", "300"))
+
+# Intervalo entre consultas de um processo pela distância do prazo: (até N dias, segundos)
+INTERVALOS_POR_PRAZO = [(3, 30 * 60), (7, 3 * 3600), (30, 12 * 3600)]
+INTERVALO_PADRAO = 24 * 3600  # prazo distante ou inválido
+
+def _abrir():
+    conn = conectar("esaj")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS monitoramento (
+            numero           TEXT PRIMARY KEY,
+            prazo            TEXT,
+            proxima_consulta REAL NOT NULL,
+            ultima_consulta  REAL,
+            ultima_alteracao REAL,
+            falhas           INTEGER NOT NULL DEFAULT 0,
+            erro             TEXT
+        )
+    """)
+    return conn
+
+def intervalo_para_prazo(prazo, hoje=None):
+    """
+    Segundos entre duas consultas de um processo com esse prazo.
+    """
+    dia = dia_do_prazo(prazo)
+    if dia is None:
+        return INTERVALO_PADRAO
+    faltam = dia - (hoje or datetime.date.today()).toordinal()
+    for ate, intervalo in INTERVALOS_POR_PRAZO:
+        if faltam <= ate:
+            return intervalo
+    return INTERVALO_PADRAO
+
+def _backoff(falhas):
+    return min(ESAJ_BACKOFF_MAX, ESAJ_BACKOFF_BASE * 2 ** (falhas - 1)) * random.uniform(0.5, 1.5)
+
+class OrcamentoPorHost:
+    """
+    Janela deslizante: no máximo `limite` requisições por host a cada `janela` segundos.
+    Erros seguidos num host pausam todas as consultas a ele (backoff com jitter).
+    """
+    def __init__(self, limite, janela=3600):
+        self.limite = limite
+        self.janela = janela
+        self._usos = {}
+        self._falhas = {}
+        self._pausado_ate = {}
+
+    def espera(self, host, agora=None):
+        """
+        Segundos até o host aceitar mais uma requisição (0 = pode consultar agora).
+        """
+        agora = time.time() if agora is None else agora
+        usos = self._usos.setdefault(host, deque())
+        while usos and usos[0] <= agora - self.janela:
+            usos.popleft()
+        espera = max(0.0, self._pausado_ate.get(host, 0) - agora)
+        if len(usos) >= self.limite:
+            espera = max(espera, usos[0] + self.janela - agora)
+        return espera
+
+    def registrar(self, host, sucesso, agora=None):
+        agora = time.time() if agora is None else agora
+        self._usos.setdefault(host, deque()).append(agora)
+        if sucesso:
+            self._falhas.pop(host, None)
+            self._pausado_ate.pop(host, None)
+            return
+        falhas = self._falhas[host] = self._falhas.get(host, 0) + 1
+        self._pausado_ate[host] = agora + _backoff(falhas)
+
+class AgendadorESAJ:
+    """
+    Fila de prioridade (heap) de (próxima consulta, dia do prazo, número), espelhada
+    na tabela `monitoramento`. Entradas obsoletas do heap são descartadas ao sair.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heap = []
+        self.estado = {}  # numero -> (proxima_consulta, dia do prazo) vigente no heap
+        with closing(_abrir()) as conn:
+            for numero, prazo, proxima in conn.execute(
+                "SELECT numero, prazo, proxima_consulta FROM monitoramento"
+            ):
+                self._por(numero, proxima, prazo)
+
+    def _por(self, numero, proxima, prazo):
+        dia = dia_do_prazo(prazo)
+        chave = (proxima, dia if dia is not None else float("inf"))
+        self.estado[numero] = chave
+        heapq.heappush(self.heap, (*chave, numero))
+
+    def sincronizar(self, processos, agora=None):
+        """
+        Acompanha os processos em andamento de `processos` (linhas da aba Processo):
+        inclui os novos, reagenda os que mudaram de prazo e esquece os encerrados ou removidos.
+        """
+        agora = time.time() if agora is None else agora
+        abertos = {}
+        for p in processos:
+            numero = str(p.get("numero") or "").strip()
+            if numero and not bool(p.get("encerrado")):
+                abertos[numero] = str(p.get("prazo") or "")
+        with self.lock, closing(_abrir()) as conn, conn:
+            gravados = {
+                n: (prazo, proxima, ultima, falhas)
+                for n, prazo, proxima, ultima, falhas in conn.execute(
+                    "SELECT numero, prazo, proxima_consulta, ultima_consulta, falhas FROM monitoramento"
+                )
+            }
+            removidos = [(n,) for n in gravados if n not in abertos]
+            conn.executemany("DELETE FROM monitoramento WHERE numero = ?", removidos)
+            for (n,) in removidos:
+                self.estado.pop(n, None)
+
+            alterados = []
+            for numero, prazo in abertos.items():
+                anterior = gravados.get(numero)
+                if anterior is None:
+                    # Nunca consultado: vence já; entre esses, o desempate é o prazo
+                    proxima = agora
+                else:
+                    prazo_anterior, proxima, ultima, falhas = anterior
+                    if prazo_anterior == prazo:
+                        continue
+                    # Reagenda pelo novo prazo; com backoff em curso, vale a hora do backoff
+                    if ultima is not None and not falhas:
+                        proxima = ultima + intervalo_para_prazo(prazo)
+                alterados.append((numero, prazo, proxima))
+                self._por(numero, proxima, prazo)
+            conn.executemany(
+                """
+                INSERT INTO monitoramento (numero, prazo, proxima_consulta) VALUES (?, ?, ?)
+                ON CONFLICT(numero) DO UPDATE SET
+                    prazo = excluded.prazo, proxima_consulta = excluded.proxima_consulta
+                """,
+                alterados,
+            )
+            # Só reconstrói o heap quando o lixo (entradas obsoletas) passa do dobro do útil
+            if len(self.heap) > 2 * len(self.estado) + 64:
+                self.heap = [(*c, n) for n, c in self.estado.items()]
+                heapq.heapify(self.heap)
+        return len(alterados), len(removidos)
+
+    def proximo(self):
+        """
+        (hora da próxima consulta, número) do processo mais urgente, ou None.
+        """
+        with self.lock:
+            while self.heap:
+                proxima, dia, numero = self.heap[0]
+                if self.estado.get(numero) == (proxima, dia):
+                    return proxima, numero
+                heapq.heappop(self.heap)
+            return None
+
+    def registrar(self, numero, resultado, agora=None):
+        """
+        Grava o resultado de uma consulta (item de consultar_movimentacoes_em_lote)
+        e reagenda o processo: pelo prazo se deu certo, com backoff se deu erro.
+        """
+        agora = time.time() if agora is None else agora
+        with self.lock, closing(_abrir()) as conn, conn:
+            linha = conn.execute(
+                "SELECT prazo, falhas FROM monitoramento WHERE numero = ?", (numero,)
+            ).fetchone()
+            if linha is None:
+                return  # deixou de ser acompanhado enquanto era consultado
+            prazo, falhas = linha
+            if resultado["erro"]:
+                falhas += 1
+                proxima = agora + _backoff(falhas)
+                conn.execute(
+                    "UPDATE monitoramento SET proxima_consulta = ?, falhas = ?, erro = ? WHERE numero = ?",
+                    (proxima, falhas, str(resultado["erro"])[:500], numero),
+                )
+            else:
+                proxima = agora + intervalo_para_prazo(prazo)
+                conn.execute(
+                    """
+                    UPDATE monitoramento SET proxima_consulta = ?, ultima_consulta = ?, falhas = 0, erro = NULL,
+                        ultima_alteracao = CASE WHEN ? THEN ? ELSE ultima_alteracao END
+                    WHERE numero = ?
+                    """,
+                    (proxima, agora, resultado["houve_movimentacao"], agora, numero),
+                )
+            self._por(numero, proxima, prazo)
+
+def situacao(numeros=None):
+    """
+    {numero: {"ultima_consulta", "ultima_alteracao", "proxima_consulta", "falhas", "erro"}}
+    dos processos acompanhados (todos, ou só os de `numeros`).
+    """
+    sql = "SELECT numero, ultima_consulta, ultima_alteracao, proxima_consulta, falhas, erro FROM monitoramento"
+    with closing(_abrir()) as conn:
+        linhas = conn.execute(sql).fetchall()
+    filtro = None if numeros is None else {str(n) for n in numeros}
+    return {
+        n: {"ultima_consulta": u, "ultima_alteracao": a, "proxima_consulta": p, "falhas": f, "erro": e}
+        for n, u, a, p, f, e in linhas
+        if filtro is None or n in filtro
+    }
+
+def resumo():
+    """
+    Contagens do monitoramento: acompanhados, vencidos (aguardando consulta), com falha,
+    consultados e alterados nas últimas 24 h.
+    """
+    agora = time.time()
+    with closing(_abrir()) as conn:
+        acompanhados, vencidos, com_falha, consultados, alterados = conn.execute(
+            """
+            SELECT COUNT(*),
+                   COALESCE(SUM(proxima_consulta <= ?), 0),
+                   COALESCE(SUM(falhas > 0), 0),
+                   COALESCE(SUM(ultima_consulta >= ?), 0),
+                   COALESCE(SUM(ultima_alteracao >= ?), 0)
+            FROM monitoramento
+            """,
+            (agora, agora - 86400, agora - 86400),
+        ).fetchone()
+    return {
+        "acompanhados": acompanhados, "vencidos": vencidos, "com_falha": com_falha,
+        "consultados_24h": consultados, "alterados_24h": alterados,
+    }
+
+_lock = threading.Lock()
+_worker = None
+
+def _executar(agendador, orcamento):
+    from . import esaj  # BeautifulSoup só é importado com o monitoramento ligado
+    host = urlsplit(esaj.ESAJ_URL).hostname
+    proxima_sincronizacao = 0.0
+    while True:
+        agora = time.time()
+        if agora >= proxima_sincronizacao:
+            try:
+                agendador.sincronizar(replica.ler_aba("Processo"), agora)
+            except Exception:
+                metricas.contar("erros", operacao="monitor_esaj_sincronizacao")
+            proxima_sincronizacao = agora + ESAJ_INTERVALO_SINCRONIZACAO
+
+        item = agendador.proximo()
+        espera = proxima_sincronizacao - agora
+        if item is not None:
+            espera = min(espera, max(item[0] - agora, orcamento.espera(host, agora)))
+        if espera > 0:
+            time.sleep(espera)
+            continue
+
+        numero = item[1]
+        try:
+            resultado = esaj.consultar_movimentacoes_em_lote([numero], max_concorrencia=1, ttl=0)[numero]
+            orcamento.registrar(host, resultado["erro"] is None)
+            agendador.registrar(numero, resultado)
+        except Exception:
+            # Falha local (ex.: banco ocupado); tenta de novo depois de uma pausa
+            metricas.contar("erros", operacao="monitor_esaj")
+            time.sleep(ESAJ_BACKOFF_BASE)
+            continue
+        metricas.contar(
+            "monitor_esaj_consultas",
+            resultado="erro" if resultado["erro"] else "alterado" if resultado["houve_movimentacao"] else "sem_alteracao",
+        )
+
+def iniciar_monitoramento():
+    """
+    Sobe (uma única vez por processo, e só com ESAJ_MONITORAMENTO=1) a thread que
+    consulta o ESAJ na ordem da fila de prioridade.
+    """
+    global _worker
+    if not ESAJ_MONITORAMENTO:
+        return
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(
+            target=_executar, args=(AgendadorESAJ(), OrcamentoPorHost(ESAJ_ORCAMENTO_POR_HORA)),
+            name="monitor-esaj", daemon=True,
+        )
+        _worker.start()
@@ -1,29 +1,278 @@
 # servicos/planilhas.py
 import os
-import requests
-import httpx
+import json
+import time
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
+from . import replica, fila_envios, metricas, revalidacao
+from .conexoes import obter_cliente
 
 load_dotenv()
 GAS_WEB_APP_URL = os.getenv("GAS_WEB_APP_URL")
+# Envio de vários registros num único POST {"tipo": "Lote", "itens": [...]}, que o
+# script do GAS precisa tratar: "0" (padrão) nunca, "1" para toda a fila e "massa" só
+# para os registros das importações em massa. Se o GAS responder com
+# GAS_RESPOSTA_LOTE_NAO_SUPORTADO, o processo volta a enviar um a um
+GAS_ENVIO_EM_LOTE = os.getenv("GAS_ENVIO_EM_LOTE", "0")
+GAS_RESPOSTA_LOTE_NAO_SUPORTADO = os.getenv("GAS_RESPOSTA_LOTE_NAO_SUPORTADO", "tipo desconhecido")
+_lote_recusado = False
+# Com "1", leituras paginadas vão direto ao GAS (offset, limit, ordenar, ordem e filtros na
+# query string, resposta {"linhas": [...], "total": n}); senão são resolvidas na réplica local
+GAS_PAGINACAO_REMOTA = os.getenv("GAS_PAGINACAO_REMOTA", "0") == "1"
+# Com "1" (padrão), cache expirado é servido na hora a partir da réplica e a aba é
+# atualizada em segundo plano; só réplicas mais velhas que PLANILHA_SWR_IDADE_MAXIMA
+# segundos (ou inexistentes) fazem o usuário esperar pelo GAS
+PLANILHA_SWR = os.getenv("PLANILHA_SWR", "1") == "1"
+PLANILHA_SWR_IDADE_MAXIMA = float(os.getenv("PLANILHA_SWR_IDADE_MAXIMA", "86400"))
 
-@st.cache_data(ttl=300, show_spinner=False)
-def carregar_dados_da_planilha(tipo, debug=False):
+# TTL do cache de cada aba; _carregada_em guarda quando cada aba foi lida para o cache
+PLANILHA_CACHE_TTL = 300
+_carregada_em = {}
+
+# Versão de cada aba no processo: muda a cada gravação, o que troca a chave do
+# st.cache_data só daquela aba para todas as sessões
+_versoes_abas = {}
+_lock_versoes = threading.Lock()
+
+def _buscar_na_planilha(tipo, desde=None, debug=False):
     """
-    Faz GET ao Google Apps Script para obter dados de uma aba específica.
-    Retorna lista de dicionários ou [] em caso de erro.
+    GET ao Google Apps Script. Com `desde`, pede só as linhas cadastradas a partir dessa marca.
     """
-    try:
-        resp = requests.get(GAS_WEB_APP_URL, params={"tipo": tipo}, timeout=10)
+    params = {"tipo": tipo}
+    if desde:
+        params["desde"] = desde
+    with metricas.medir("gas_get", tipo=tipo):
+        resp = obter_cliente().get(GAS_WEB_APP_URL, params=params)
         resp.raise_for_status()
-        if debug:
-            st.text(f"URL chamada: {resp.url}")
-            st.text(f"Resposta bruta: {resp.text[:200]}")
-        return resp.json()
+    metricas.registrar_payload("gas_get", len(resp.content), tipo=tipo)
+    if debug:
+        st.text(f"URL chamada: {resp.url}")
+        st.text(f"Resposta bruta: {resp.text[:200]}")
+    return resp.json()
+
+def _sincronizar_replica(tipo, debug=False):
+    try:
+        alteradas = replica.sincronizar_aba(
+            tipo, lambda t, desde: _buscar_na_planilha(t, desde, debug=debug),
+            fila_envios.dados_pendentes,
+        )
     except Exception as e:
         st.error(f"Erro ao carregar dados ({tipo}): {e}")
-        return []
+        return
+    if alteradas:
+        # Em qualquer caminho, linhas novas, alteradas ou removidas trocam a versão da aba
+        # (é a versão que atualiza o armazém e os índices montados sobre ele)
+        invalidar_aba(tipo)
+
+def _revalidar_aba(tipo):
+    # Roda na thread de revalidação: sincroniza, troca a versão da aba se algo mudou
+    # e recria o cache da versão atual (e o armazém), para que o TTL não deixe uma
+    # falha de cache para a próxima sessão
+    with metricas.medir("revalidacao", tipo=tipo):
+        alteradas = replica.sincronizar_aba(tipo, _buscar_na_planilha, fila_envios.dados_pendentes)
+    margem = revalidacao.REVALIDACAO_INTERVALO_PREAQUECIMENTO
+    if alteradas:
+        invalidar_aba(tipo)
+        recarregar = True
+    else:
+        # Nada mudou: só recria o cache se ele expira antes do próximo pré-aquecimento
+        recarregar = time.time() - _carregada_em.get(tipo, 0) >= PLANILHA_CACHE_TTL - margem
+        if recarregar:
+            _carregar_aba.clear(tipo, versao_aba(tipo), False)
+    if recarregar:
+        metricas.contar("cache_consultas", cache="aba")
+        _carregar_aba(tipo, versao_aba(tipo), False)
+    # Import tardio: armazem importa este módulo
+    from .armazem import preaquecer_armazem
+    preaquecer_armazem(tipo, margem)
+
+def _garantir_replica(tipo, debug=False):
+    if revalidacao.em_segundo_plano():
+        return  # a própria revalidação acabou de sincronizar
+    ultima = replica.ultima_carga_completa(tipo)
+    if PLANILHA_SWR and ultima and time.time() - ultima < PLANILHA_SWR_IDADE_MAXIMA:
+        revalidacao.iniciar_worker(_revalidar_aba)
+        revalidacao.agendar(tipo)
+        return
+    _sincronizar_replica(tipo, debug)
+
+def _congelar(linhas):
+    # Instantâneo imutável da aba: tupla de registros somente leitura
+    return tuple(MappingProxyType(linha) for linha in linhas)
+
+# cache_resource (e não cache_data): o instantâneo de cada versão existe uma única vez
+# no processo e todas as sessões recebem o mesmo objeto, sem cópia a cada chamada
+@st.cache_resource(ttl=PLANILHA_CACHE_TTL, max_entries=64, show_spinner=False)
+def _carregar_aba(tipo, versao, debug=False):
+    # Só executa em falha de cache
+    metricas.contar("cache_falhas", cache="aba")
+    _carregada_em[tipo] = time.time()
+    _garantir_replica(tipo, debug)
+    return _congelar(replica.ler_aba(tipo))
+
+def _buscar_janela_na_planilha(tipo, offset, limite, ordenar_por, decrescente, filtros):
+    params = {"tipo": tipo, "offset": offset}
+    if limite is not None:
+        params["limit"] = limite
+    if ordenar_por:
+        params["ordenar"] = ordenar_por
+        params["ordem"] = "desc" if decrescente else "asc"
+    if filtros:
+        params["filtros"] = json.dumps(filtros, ensure_ascii=False)
+    with metricas.medir("gas_get_janela", tipo=tipo):
+        resp = obter_cliente().get(GAS_WEB_APP_URL, params=params)
+        resp.raise_for_status()
+    metricas.registrar_payload("gas_get_janela", len(resp.content), tipo=tipo)
+    dados = resp.json()
+    # GAS sem suporte a paginação devolve a lista completa: a janela sai dela aqui
+    if isinstance(dados, list):
+        return _janela_local(dados, offset, limite, ordenar_por, decrescente, filtros)
+    return dados["linhas"], dados["total"]
+
+def _como_texto(valor):
+    # Mesma comparação da réplica (CAST(json_extract(...) AS TEXT)): booleanos viram 1/0
+    if isinstance(valor, bool):
+        return str(int(valor))
+    return None if valor is None else str(valor)
+
+def _chave_ordenacao(valor):
+    if valor is None:
+        return (0, 0)
+    if isinstance(valor, (bool, int, float)):
+        return (1, valor)
+    return (2, str(valor))
+
+def _janela_local(linhas, offset, limite, ordenar_por, decrescente, filtros):
+    # Equivalente em memória de replica.ler_janela, para respostas sem paginação
+    for campo, valor in (filtros or {}).items():
+        valores = {_como_texto(v) for v in (valor if isinstance(valor, (list, tuple, set)) else [valor])}
+        linhas = [l for l in linhas if _como_texto(l.get(campo)) in valores]
+    if ordenar_por:
+        # Como no SQLite: nulos, depois números, depois textos. A ordenação é estável,
+        # então empates mantêm a ordem da planilha (também em ordem decrescente)
+        linhas = sorted(linhas, key=lambda l: _chave_ordenacao(l.get(ordenar_por)), reverse=decrescente)
+    fim = None if limite is None else offset + limite
+    return linhas[offset:fim], len(linhas)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _carregar_janela(tipo, versao, offset, limite, ordenar_por, decrescente, filtros, debug=False):
+    metricas.contar("cache_falhas", cache="janela")
+    if GAS_PAGINACAO_REMOTA:
+        try:
+            return _buscar_janela_na_planilha(tipo, offset, limite, ordenar_por, decrescente, filtros)
+        except Exception as e:
+            st.error(f"Erro ao carregar dados ({tipo}): {e}")
+            return [], 0
+    _garantir_replica(tipo, debug)
+    return replica.ler_janela(tipo, offset, limite, ordenar_por, decrescente, filtros)
+
+def carregar_pagina_da_planilha(tipo, offset=0, limit=None, ordenar_por=None, decrescente=False, filtros=None, debug=False):
+    """
+    Carrega só uma janela da aba: `filtros` ({campo: valor ou lista}) por igualdade,
+    ordenação por `ordenar_por` e offset/limit.
+    Retorna (lista de dicionários, total de linhas que atendem aos filtros).
+    """
+    metricas.contar("cache_consultas", cache="janela")
+    return _carregar_janela(
+        tipo, _versoes_abas.get(tipo, 0), int(offset or 0), limit,
+        ordenar_por, decrescente, filtros, debug
+    )
+
+def carregar_dados_da_planilha(tipo, debug=False, offset=None, limit=None, ordenar_por=None, decrescente=False, filtros=None):
+    """
+    Sincroniza a réplica local da aba com o Google Apps Script (apenas o delta
+    desde a última marca) e devolve as linhas a partir da réplica.
+    Com offset/limit/ordenar_por/filtros, devolve só a janela pedida (ver carregar_pagina_da_planilha).
+    Retorna o instantâneo da versão atual da aba (em caso de erro no GAS, o que houver
+    na réplica): uma tupla de registros somente leitura, compartilhada por todas as
+    sessões. Para alterar um registro, copie-o antes (dict(linha)).
+    """
+    if offset is not None or limit is not None or ordenar_por or filtros:
+        return carregar_pagina_da_planilha(
+            tipo, offset, limit, ordenar_por, decrescente, filtros, debug
+        )[0]
+    metricas.contar("cache_consultas", cache="aba")
+    return _carregar_aba(tipo, _versoes_abas.get(tipo, 0), debug)
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _carregar_corpo(tipo, chave, versao):
+    metricas.contar("cache_falhas", cache="corpo")
+    return replica.ler_corpos(tipo, [chave]).get(chave, "")
+
+def carregar_corpo_da_planilha(tipo, chave):
+    """
+    Texto do campo volumoso (replica.CORPOS_POR_ABA, ex.: o conteúdo das petições) de um
+    único registro, que não vem em carregar_dados_da_planilha. `chave` é a de
+    replica.chave_da_linha; o resultado fica em cache por registro e versão da aba.
+    """
+    metricas.contar("cache_consultas", cache="corpo")
+    return _carregar_corpo(tipo, chave, _versoes_abas.get(tipo, 0))
+
+def versao_aba(tipo):
+    """
+    Versão atual da aba no processo (muda a cada invalidar_aba).
+    """
+    return _versoes_abas.get(tipo, 0)
+
+def invalidar_aba(tipo):
+    """
+    Descarta o cache apenas da aba `tipo`; a próxima leitura vem da réplica local.
+    """
+    with _lock_versoes:
+        _versoes_abas[tipo] = _versoes_abas.get(tipo, 0) + 1
+
+def mesclar_no_cache(tipo, linha):
+    """
+    Inclui (ou substitui) um registro recém-gravado na réplica e invalida a aba,
+    para que todas as sessões o vejam sem recarregar a planilha inteira.
+    """
+    replica.mesclar_linhas(tipo, [linha])
+    invalidar_aba(tipo)
+
+def atualizar_no_cache(tipo, campo, valor, alteracoes):
+    """
+    Aplica uma atualização parcial (registros com `campo` == `valor`) na réplica e invalida a aba.
+    """
+    replica.alterar_linhas(tipo, campo, valor, alteracoes)
+    invalidar_aba(tipo)
+
+def carregar_varias_abas(tipos, debug=False):
+    """
+    Carrega várias abas em paralelo (uma thread por aba), mantendo o cache
+    individual de carregar_dados_da_planilha. O tempo total passa a ser o da
+    aba mais lenta, e não a soma de todas.
+    Retorna dicionário {tipo: lista de dicionários}.
+    """
+    tipos = list(tipos)
+    if not tipos:
+        return {}
+    ctx = get_script_run_ctx()
+
+    def carregar(tipo):
+        # Sem o contexto da sessão, st.cache_data e st.error não funcionam na thread
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return carregar_dados_da_planilha(tipo, debug) or []
+
+    with ThreadPoolExecutor(max_workers=len(tipos)) as pool:
+        return dict(zip(tipos, pool.map(carregar, tipos)))
+
+def _postar_na_planilha(payload, idempotencia=None):
+    """
+    POST ao Google Apps Script; levanta RuntimeError se a resposta não for "OK".
+    A chave de idempotência vai na query string para não alterar o corpo esperado pelo GAS.
+    """
+    params = {"idempotencia": idempotencia} if idempotencia else None
+    tipo = payload.get("tipo")
+    with metricas.medir("gas_post", tipo=tipo):
+        resp = obter_cliente().post(GAS_WEB_APP_URL, json=payload, params=params)
+        metricas.registrar_payload("gas_post", len(resp.request.content), "envio", tipo=tipo)
+        if resp.text.strip() != "OK":
+            raise RuntimeError(resp.text)
 
 def enviar_dados_para_planilha(tipo, dados):
     """
@@ -31,13 +280,88 @@ def enviar_dados_para_planilha(tipo, dados):
     Retorna True se o GAS responder "OK".
     """
     try:
-        payload = {"tipo": tipo, **dados}
-        with httpx.Client(timeout=10, follow_redirects=True) as client:
-            resp = client.post(GAS_WEB_APP_URL, json=payload)
-        if resp.text.strip() == "OK":
-            return True
-        st.error(f"Erro no envio ({tipo}): {resp.text}")
+        _postar_na_planilha({"tipo": tipo, **dados})
+        return True
+    except RuntimeError as e:
+        st.error(f"Erro no envio ({tipo}): {e}")
         return False
     except Exception as e:
         st.error(f"Erro ao enviar ({tipo}): {e}")
         return False
+
+def _lote_nao_suportado(erro):
+    return GAS_RESPOSTA_LOTE_NAO_SUPORTADO.lower() in str(erro).lower()
+
+def _enviar_lote(itens):
+    global _lote_recusado
+    em_lote = []
+    if GAS_ENVIO_EM_LOTE == "1":
+        em_lote = itens
+    elif GAS_ENVIO_EM_LOTE == "massa":
+        em_lote = [i for i in itens if fila_envios.enfileirado_em_massa(i["id"])]
+    erros = {}
+    if len(em_lote) > 1 and not _lote_recusado:
+        try:
+            _postar_na_planilha(
+                {"tipo": "Lote", "itens": [{"tipo": i["tipo"], **i["dados"]} for i in em_lote]},
+                ",".join(i["id"] for i in em_lote),
+            )
+            resolvidos = {i["id"] for i in em_lote}
+        except Exception as e:
+            if isinstance(e, RuntimeError) and _lote_nao_suportado(e):
+                # GAS sem suporte a "Lote": estes itens seguem um a um, agora e daqui em diante
+                _lote_recusado = True
+                metricas.contar("gas_lote_recusado")
+                resolvidos = set()
+            else:
+                # Falha passageira (rede, timeout, 5xx): o lote volta para a fila, com backoff
+                erros = {i["id"]: e for i in em_lote}
+                resolvidos = set(erros)
+        itens = [i for i in itens if i["id"] not in resolvidos]
+    for item in itens:
+        try:
+            _postar_na_planilha({"tipo": item["tipo"], **item["dados"]}, item["id"])
+        except Exception as e:
+            erros[item["id"]] = e
+    return erros
+
+def iniciar_envios_em_segundo_plano():
+    """
+    Garante que a thread que drena a fila de envios esteja rodando
+    (inclusive para pendências deixadas por uma execução anterior).
+    """
+    fila_envios.iniciar_worker(_enviar_lote)
+
+def iniciar_revalidacao_em_segundo_plano():
+    """
+    Garante que a thread de revalidação esteja rodando, pré-aquecendo as
+    abas de revalidacao.ABAS_QUENTES antes que o cache delas expire.
+    """
+    if PLANILHA_SWR:
+        revalidacao.iniciar_worker(_revalidar_aba)
+
+def enfileirar_envio_para_planilha(tipo, dados):
+    """
+    Grava o registro na fila local de envios e retorna imediatamente.
+    O envio ao GAS acontece em segundo plano, com novas tentativas em caso de falha;
+    o registro já entra na réplica local e aparece nas próximas leituras da aba.
+    Retorna a chave de idempotência do envio.
+    """
+    chave = fila_envios.enfileirar(tipo, dados)
+    iniciar_envios_em_segundo_plano()
+    mesclar_no_cache(tipo, dados)
+    return chave
+
+def enfileirar_varios_para_planilha(tipo, registros, prefixo):
+    """
+    Versão em massa de enfileirar_envio_para_planilha: grava os registros na fila
+    numa única transação e na réplica de uma vez, invalidando a aba uma só vez.
+    Acompanhe o envio com fila_envios.andamento(prefixo).
+    """
+    if not registros:
+        return 0
+    n = fila_envios.enfileirar_varios(tipo, registros, prefixo)
+    iniciar_envios_em_segundo_plano()
+    replica.mesclar_linhas(tipo, registros)
+    invalidar_aba(tipo)
+    return n
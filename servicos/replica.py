@@ -0,0 +1,340 @@
+# servicos/replica.py
+import os
+import json
+import time
+import zlib
+import hashlib
+import itertools
+import threading
+from contextlib import closing
+from .armazenamento import conectar
+
+# Réplica local (SQLite) das abas do GAS. Cada aba guarda suas linhas e uma
+# marca d'água (maior valor da coluna de cadastro já vista); as sincronizações
+# seguintes pedem ao GAS apenas as linhas com marca >= essa.
+
+INTERVALO_SINCRONIZACAO_COMPLETA = int(os.getenv("REPLICA_INTERVALO_COMPLETO", "3600"))
+# Intervalo mínimo entre duas consultas de delta da mesma aba ao GAS
+INTERVALO_SINCRONIZACAO_MINIMO = int(os.getenv("REPLICA_INTERVALO_MINIMO", "30"))
+
+# Coluna usada como identificador de cada linha, por aba ("id" tem prioridade).
+# Historico_Peticao não tem chave natural (duas petições do mesmo tipo no mesmo dia
+# são comuns): sem "id", vale o hash da linha inteira, conteúdo incluído
+CHAVES_POR_ABA = {
+    "Processo":          ("numero",),
+    "Cliente":           ("email",),
+    "Escritorio":        ("cnpj",),
+    "Funcionario":       ("usuario",),
+}
+
+# Coluna usada como marca d'água, por aba
+MARCA_POR_ABA = {
+    "Cliente":           "cadastro",
+    "Historico_Peticao": "data",
+}
+MARCA_PADRAO = "data_cadastro"
+
+# Campo volumoso de cada aba, guardado à parte e comprimido (zlib): as linhas da aba
+# (ler_aba, ler_janela) vêm sem ele e o texto é lido por registro com ler_corpos()
+CORPOS_POR_ABA = {
+    "Historico_Peticao": "conteudo",
+}
+
+# Versão do esquema das chaves (PRAGMA user_version). Ao subir, as abas afetadas são
+# apagadas e voltam na próxima carga completa, já com as chaves novas
+VERSAO_CHAVES = 1
+ABAS_POR_VERSAO_CHAVES = {1: ("Historico_Peticao",)}
+
+_lock_escrita = threading.Lock()
+_ultima_sincronizacao = {}
+
+def _abrir():
+    conn = conectar("replica")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS linhas (
+            aba   TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            ordem INTEGER NOT NULL,
+            dados TEXT NOT NULL,
+            PRIMARY KEY (aba, chave)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sincronizacao (
+            aba              TEXT PRIMARY KEY,
+            marca            TEXT,
+            ultima_completa  REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corpos (
+            aba      TEXT NOT NULL,
+            chave    TEXT NOT NULL,
+            conteudo BLOB NOT NULL,
+            PRIMARY KEY (aba, chave)
+        )
+    """)
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    if versao < VERSAO_CHAVES:
+        _migrar_chaves(conn, versao)
+    return conn
+
+def _migrar_chaves(conn, versao):
+    # BEGIN IMMEDIATE pega o lock de escrita do SQLite, que vale entre threads e processos
+    # (_lock_escrita não serve: parte das chamadas de _abrir() já o tem, parte não).
+    # A versão é relida dentro da transação: quem chegar depois não refaz a migração
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        abas = [a for v in range(versao + 1, VERSAO_CHAVES + 1) for a in ABAS_POR_VERSAO_CHAVES.get(v, ())]
+        for tabela in ("linhas", "corpos", "sincronizacao"):
+            conn.executemany(f"DELETE FROM {tabela} WHERE aba = ?", [(a,) for a in abas])
+        conn.execute(f"PRAGMA user_version = {max(versao, VERSAO_CHAVES)}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def chave_da_linha(tipo, linha):
+    """
+    Identificador estável de uma linha: coluna "id", colunas-chave da aba
+    ou, na falta delas, o hash do conteúdo. Nas abas de CORPOS_POR_ABA, o hash é o da
+    linha completa e vai gravado como "id" na réplica, já que as linhas lidas dela
+    vêm sem o corpo.
+    """
+    if linha.get("id") not in (None, ""):
+        return str(linha["id"])
+    campos = CHAVES_POR_ABA.get(tipo, ())
+    valores = [str(linha.get(c, "")) for c in campos]
+    if campos and any(valores):
+        return "|".join(valores)
+    bruto = json.dumps(linha, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+def _marca_da_linha(tipo, linha):
+    valor = linha.get(MARCA_POR_ABA.get(tipo, MARCA_PADRAO))
+    return str(valor) if valor not in (None, "") else None
+
+def _gravar(conn, tipo, linhas, reordenar=False):
+    # Linhas idênticas às já gravadas não contam como alteração.
+    # Com `reordenar`, a ordem passa a ser a da lista (carga completa); senão, as novas vão para o fim.
+    proxima = 0 if reordenar else conn.execute(
+        "SELECT COALESCE(MAX(ordem), -1) + 1 FROM linhas WHERE aba = ?", (tipo,)
+    ).fetchone()[0]
+    atualizacao = (
+        "dados = excluded.dados, ordem = excluded.ordem "
+        "WHERE linhas.dados <> excluded.dados OR linhas.ordem <> excluded.ordem"
+        if reordenar else
+        "dados = excluded.dados WHERE linhas.dados <> excluded.dados"
+    )
+    campo_corpo = CORPOS_POR_ABA.get(tipo)
+    registros, corpos = [], []
+    for i, l in enumerate(linhas):
+        chave = chave_da_linha(tipo, l)
+        if campo_corpo in l:
+            l = dict(l)
+            corpos.append((tipo, chave, zlib.compress(str(l.pop(campo_corpo) or "").encode("utf-8"))))
+            if l.get("id") in (None, ""):
+                l["id"] = chave
+        registros.append((tipo, chave, proxima + i, json.dumps(l, ensure_ascii=False, default=str)))
+    alteradas = conn.executemany(
+        f"""
+        INSERT INTO linhas (aba, chave, ordem, dados) VALUES (?, ?, ?, ?)
+        ON CONFLICT(aba, chave) DO UPDATE SET {atualizacao}
+        """,
+        registros,
+    ).rowcount
+    if corpos:
+        alteradas += conn.executemany(
+            """
+            INSERT INTO corpos (aba, chave, conteudo) VALUES (?, ?, ?)
+            ON CONFLICT(aba, chave) DO UPDATE SET conteudo = excluded.conteudo
+            WHERE corpos.conteudo <> excluded.conteudo
+            """,
+            corpos,
+        ).rowcount
+    return alteradas
+
+def _remover_ausentes(conn, tipo, linhas, pendentes=()):
+    # Linhas que sumiram da planilha (carga completa), exceto as `pendentes`: gravadas
+    # aqui antes de o GAS confirmar o envio, ainda não aparecem na planilha
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS chaves_recebidas (chave TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM chaves_recebidas")
+    conn.executemany(
+        "INSERT OR IGNORE INTO chaves_recebidas (chave) VALUES (?)",
+        ((chave_da_linha(tipo, l),) for l in itertools.chain(linhas, pendentes)),
+    )
+    conn.execute(
+        "DELETE FROM corpos WHERE aba = ? AND chave NOT IN (SELECT chave FROM chaves_recebidas)",
+        (tipo,),
+    )
+    return conn.execute(
+        "DELETE FROM linhas WHERE aba = ? AND chave NOT IN (SELECT chave FROM chaves_recebidas)",
+        (tipo,),
+    ).rowcount
+
+def mesclar_linhas(tipo, linhas):
+    """
+    Insere ou atualiza linhas na réplica sem alterar a marca d'água.
+    """
+    with _lock_escrita, closing(_abrir()) as conn, conn:
+        _gravar(conn, tipo, linhas)
+
+def alterar_linhas(tipo, campo, valor, alteracoes):
+    """
+    Aplica `alteracoes` (dicionário) às linhas da réplica em que `campo` == `valor`.
+    Retorna a quantidade de linhas alteradas.
+    """
+    with _lock_escrita, closing(_abrir()) as conn, conn:
+        linhas = conn.execute(
+            "SELECT chave, dados FROM linhas WHERE aba = ? AND json_extract(dados, ?) = ?",
+            (tipo, f'$."{campo}"', valor),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE linhas SET dados = ? WHERE aba = ? AND chave = ?",
+            [
+                (json.dumps({**json.loads(d), **alteracoes}, ensure_ascii=False, default=str), tipo, c)
+                for c, d in linhas
+            ],
+        )
+    return len(linhas)
+
+def sincronizar_aba(tipo, buscar, pendentes=None):
+    """
+    Atualiza a réplica da aba `tipo`.
+    `buscar(tipo, desde)` deve devolver a lista de linhas do GAS; com `desde`
+    preenchido, apenas as linhas cuja marca seja >= `desde`.
+    `pendentes(tipo)`, se dado, devolve as linhas gravadas localmente que o GAS ainda
+    não confirmou; a carga completa não as remove.
+    Faz uma carga completa na primeira vez e a cada INTERVALO_SINCRONIZACAO_COMPLETA
+    segundos (para refletir edições e exclusões); nas demais, só o delta, no
+    máximo uma vez a cada INTERVALO_SINCRONIZACAO_MINIMO segundos.
+    Retorna quantas linhas da réplica foram incluídas, alteradas ou removidas
+    (None se a consulta foi dispensada).
+    """
+    with closing(_abrir()) as conn:
+        estado = conn.execute(
+            "SELECT marca, ultima_completa FROM sincronizacao WHERE aba = ?", (tipo,)
+        ).fetchone()
+    marca, ultima_completa = estado if estado else (None, None)
+    completa = (
+        marca is None
+        or ultima_completa is None
+        or time.time() - ultima_completa >= INTERVALO_SINCRONIZACAO_COMPLETA
+    )
+    if not completa and time.time() - _ultima_sincronizacao.get(tipo, 0) < INTERVALO_SINCRONIZACAO_MINIMO:
+        return None
+
+    linhas = buscar(tipo, None if completa else marca)
+    if not isinstance(linhas, list):
+        raise ValueError(f"Resposta inesperada do GAS para {tipo}: {str(linhas)[:200]}")
+
+    marcas = [m for m in (_marca_da_linha(tipo, l) for l in linhas) if m]
+    nova_marca = max(marcas + ([marca] if marca else []), default=None)
+
+    with _lock_escrita, closing(_abrir()) as conn, conn:
+        alteradas = 0
+        if completa:
+            alteradas = _remover_ausentes(conn, tipo, linhas, pendentes(tipo) if pendentes else ())
+        alteradas += _gravar(conn, tipo, linhas, reordenar=completa)
+        conn.execute(
+            """
+            INSERT INTO sincronizacao (aba, marca, ultima_completa) VALUES (?, ?, ?)
+            ON CONFLICT(aba) DO UPDATE SET
+                marca = excluded.marca,
+                ultima_completa = COALESCE(excluded.ultima_completa, sincronizacao.ultima_completa)
+            """,
+            (tipo, nova_marca, time.time() if completa else None),
+        )
+    _ultima_sincronizacao[tipo] = time.time()
+    return alteradas
+
+def ultima_carga_completa(tipo):
+    """
+    Momento (time.time()) da última carga completa da aba na réplica, ou None se nunca houve.
+    """
+    with closing(_abrir()) as conn:
+        estado = conn.execute(
+            "SELECT ultima_completa FROM sincronizacao WHERE aba = ?", (tipo,)
+        ).fetchone()
+    return estado[0] if estado else None
+
+def _sem_corpo(tipo, linha):
+    # Linhas gravadas antes de CORPOS_POR_ABA ainda trazem o campo (até a próxima carga completa)
+    linha.pop(CORPOS_POR_ABA.get(tipo), None)
+    return linha
+
+def ler_aba(tipo):
+    """
+    Devolve as linhas da aba guardadas na réplica, na ordem da planilha
+    (sem o campo de CORPOS_POR_ABA, se houver).
+    """
+    with closing(_abrir()) as conn:
+        cursor = conn.execute(
+            "SELECT dados FROM linhas WHERE aba = ? ORDER BY ordem", (tipo,)
+        )
+        return [_sem_corpo(tipo, json.loads(d)) for (d,) in cursor]
+
+def ler_corpos(tipo, chaves):
+    """
+    {chave: texto} do campo de CORPOS_POR_ABA[tipo] dos registros `chaves`
+    (ver chave_da_linha), descomprimido. Registros sem o campo ficam de fora.
+    """
+    chaves = list(chaves)
+    corpos = {}
+    with closing(_abrir()) as conn:
+        for i in range(0, len(chaves), 500):
+            bloco = chaves[i:i + 500]
+            marcadores = ",".join("?" * len(bloco))
+            corpos.update(
+                (c, zlib.decompress(z).decode("utf-8"))
+                for c, z in conn.execute(
+                    f"SELECT chave, conteudo FROM corpos WHERE aba = ? AND chave IN ({marcadores})",
+                    [tipo] + bloco,
+                )
+            )
+            # Linhas antigas, ainda com o texto dentro de `dados`
+            faltantes = [c for c in bloco if c not in corpos]
+            if faltantes:
+                corpos.update(
+                    (c, t) for c, t in conn.execute(
+                        f"SELECT chave, json_extract(dados, ?) FROM linhas "
+                        f"WHERE aba = ? AND chave IN ({','.join('?' * len(faltantes))})",
+                        [_json_campo(CORPOS_POR_ABA[tipo]), tipo] + faltantes,
+                    )
+                    if t is not None
+                )
+    return corpos
+
+def _json_campo(campo):
+    return f'$."{campo}"'
+
+def ler_janela(tipo, offset=0, limite=None, ordenar_por=None, decrescente=False, filtros=None):
+    """
+    Lê só uma janela da aba: filtra por igualdade (`filtros` = {campo: valor ou lista de valores}),
+    ordena por `ordenar_por` (ou pela ordem da planilha) e aplica offset/limite.
+    Retorna (linhas, total de linhas que atendem aos filtros).
+    """
+    condicoes = ["aba = ?"]
+    args = [tipo]
+    for campo, valor in (filtros or {}).items():
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        condicoes.append(
+            f"CAST(json_extract(dados, ?) AS TEXT) IN ({','.join('?' * len(valores))})"
+        )
+        args += [_json_campo(campo)] + [str(v) for v in valores]
+    where = " AND ".join(condicoes)
+
+    ordem = "ordem"
+    args_ordem = []
+    if ordenar_por:
+        ordem = f"json_extract(dados, ?) {'DESC' if decrescente else 'ASC'}, ordem"
+        args_ordem = [_json_campo(ordenar_por)]
+
+    with closing(_abrir()) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM linhas WHERE {where}", args).fetchone()[0]
+        cursor = conn.execute(
+            f"SELECT dados FROM linhas WHERE {where} ORDER BY {ordem} LIMIT ? OFFSET ?",
+            args + args_ordem + [-1 if limite is None else int(limite), int(offset or 0)],
+        )
+        return [_sem_corpo(tipo, json.loads(d)) for (d,) in cursor], total
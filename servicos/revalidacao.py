@@ -0,0 +1,84 @@
+# servicos/revalidacao.py
+import os
+import time
+import threading
+from collections import deque
+
+# Atualização em segundo plano (stale-while-revalidate): quem lê recebe na hora o que
+# já está na réplica e a aba entra numa fila atendida por uma única thread. Cada aba
+# aparece no máximo uma vez na fila (ou em execução). A mesma thread pré-aquece as
+# abas mais usadas antes que o cache delas expire.
+
+# Abas atualizadas periodicamente, mesmo sem ninguém pedir
+ABAS_QUENTES = [a for a in os.getenv("REVALIDACAO_ABAS_QUENTES", "Processo,Cliente,Funcionario").split(",") if a]
+# Intervalo do pré-aquecimento; abaixo do TTL (300 s) do cache das abas
+REVALIDACAO_INTERVALO_PREAQUECIMENTO = float(os.getenv("REVALIDACAO_INTERVALO_PREAQUECIMENTO", "240"))
+
+_lock = threading.Lock()
+_acordar = threading.Event()
+_fila = deque()
+_agendadas = set()  # abas na fila ou sendo atualizadas agora
+_worker = None
+
+def agendar(tipo):
+    """
+    Pede a atualização da aba em segundo plano.
+    Retorna False se ela já estava agendada ou em andamento.
+    """
+    with _lock:
+        if tipo in _agendadas:
+            return False
+        _agendadas.add(tipo)
+        _fila.append(tipo)
+    _acordar.set()
+    return True
+
+def em_segundo_plano():
+    """
+    True quando chamado de dentro da thread de atualização.
+    """
+    return threading.current_thread() is _worker
+
+def pendentes():
+    """
+    Abas agendadas ou em atualização no momento.
+    """
+    with _lock:
+        return sorted(_agendadas)
+
+def _executar(atualizar):
+    proximo_preaquecimento = time.monotonic() + REVALIDACAO_INTERVALO_PREAQUECIMENTO
+    while True:
+        if time.monotonic() >= proximo_preaquecimento:
+            for tipo in ABAS_QUENTES:
+                agendar(tipo)
+            proximo_preaquecimento = time.monotonic() + REVALIDACAO_INTERVALO_PREAQUECIMENTO
+
+        with _lock:
+            tipo = _fila.popleft() if _fila else None
+        if tipo is None:
+            _acordar.wait(timeout=max(0.0, proximo_preaquecimento - time.monotonic()))
+            _acordar.clear()
+            continue
+        try:
+            atualizar(tipo)
+        except Exception:
+            # O erro já foi contabilizado por quem atualiza; a próxima leitura agenda de novo
+            pass
+        finally:
+            with _lock:
+                _agendadas.discard(tipo)
+
+def iniciar_worker(atualizar):
+    """
+    Sobe (uma única vez por processo) a thread que atende a fila.
+    `atualizar(tipo)` sincroniza a aba com a origem.
+    """
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(
+            target=_executar, args=(atualizar,), name="revalidacao-abas", daemon=True
+        )
+        _worker.start()
@@ -1,35 +1,109 @@
 # servicos/usuarios.py
+import os
+import hmac
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
 import streamlit as st
-from .planilhas import carregar_dados_da_planilha
+from .planilhas import carregar_dados_da_planilha, versao_aba
 
-def carregar_usuarios_da_planilha():
+# Senhas gravadas pelo sistema usam PBKDF2 ("pbkdf2_sha256$iteracoes$sal$hash").
+# Senhas antigas, em texto na planilha, viram HMAC-SHA256 com sal por usuário e um
+# segredo que só existe na memória do processo, ao montar o índice.
+SENHA_ITERACOES = int(os.getenv("SENHA_ITERACOES", "200000"))
+_SEGREDO_PROCESSO = secrets.token_bytes(32)
+
+# Resultados de verificações PBKDF2 já feitas: (hash, HMAC da tentativa) -> bool
+VERIFICACOES_EM_CACHE = 1024
+_verificacoes = OrderedDict()
+_lock_verificacoes = threading.Lock()
+
+USUARIO_PADRAO = {"username": "dono", "senha": "dono123", "papel": "owner"}
+
+def gerar_hash_senha(senha, iteracoes=SENHA_ITERACOES):
+    """
+    Hash PBKDF2-SHA256 com sal aleatório, no formato gravado na planilha.
+    """
+    sal = secrets.token_hex(16)
+    derivada = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal.encode("ascii"), iteracoes)
+    return f"pbkdf2_sha256${iteracoes}${sal}${derivada.hex()}"
+
+def _hash_local(senha, sal=None):
+    sal = sal or secrets.token_hex(16)
+    derivada = hmac.new(_SEGREDO_PROCESSO, f"{sal}${senha}".encode("utf-8"), hashlib.sha256)
+    return f"hmac_sha256${sal}${derivada.hexdigest()}"
+
+def _como_hash(senha):
+    senha = str(senha or "")
+    if senha.startswith("pbkdf2_sha256$"):
+        return senha
+    return _hash_local(senha)
+
+def verificar_senha(senha_hash, senha):
     """
-    Carrega usuários vindos do GAS e monta st.session_state.USERS.
+    Confere `senha` contra o hash. Verificações PBKDF2 são memorizadas (sem guardar
+    a senha em claro), então logins repetidos não pagam a derivação de novo.
     """
+    esquema, *partes = senha_hash.split("$")
+    if esquema == "hmac_sha256":
+        sal, _ = partes
+        return hmac.compare_digest(_hash_local(senha, sal), senha_hash)
+    if esquema != "pbkdf2_sha256":
+        return False
+
+    chave = (senha_hash, hmac.new(_SEGREDO_PROCESSO, senha.encode("utf-8"), hashlib.sha256).digest())
+    with _lock_verificacoes:
+        if chave in _verificacoes:
+            _verificacoes.move_to_end(chave)
+            return _verificacoes[chave]
+    iteracoes, sal, esperado = partes
+    derivada = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal.encode("ascii"), int(iteracoes))
+    valido = hmac.compare_digest(derivada.hex(), esperado)
+    with _lock_verificacoes:
+        _verificacoes[chave] = valido
+        while len(_verificacoes) > VERIFICACOES_EM_CACHE:
+            _verificacoes.popitem(last=False)
+    return valido
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def _indice_usuarios(versao):
     funcs = carregar_dados_da_planilha("Funcionario") or []
-    users = {}
     if not funcs:
-        users["dono"] = {"username": "dono", "senha": "dono123", "papel": "owner"}
-        return users
+        return {
+            USUARIO_PADRAO["username"]: {
+                "username": USUARIO_PADRAO["username"],
+                "senha_hash": _como_hash(USUARIO_PADRAO["senha"]),
+                "papel": USUARIO_PADRAO["papel"],
+            }
+        }
 
+    users = {}
     for f in funcs:
         key = f.get("usuario")
         if not key: continue
         users[key] = {
             "username":   key,
-            "senha":      f.get("senha", ""),
+            "senha_hash": _como_hash(f.get("senha", "")),
             "papel":      f.get("papel", "assistant"),
             "escritorio": f.get("escritorio", "Global"),
             "area":       f.get("area", "Todas")
         }
     return users
 
+def obter_indice_usuarios():
+    """
+    Índice único do processo {usuario: registro}, com senhas apenas em hash.
+    Reconstruído quando a aba Funcionario muda ou o TTL expira.
+    """
+    return _indice_usuarios(versao_aba("Funcionario"))
+
 def login(usuario, senha):
     """
-    Valida credenciais contra st.session_state.USERS.
+    Valida credenciais contra o índice de usuários.
+    Retorna o registro do usuário (sem o hash da senha) ou None.
     """
-    users = st.session_state.get("USERS", {})
-    u = users.get(usuario)
-    if u and u.get("senha") == senha:
-        return u
+    u = obter_indice_usuarios().get(usuario)
+    if u and verificar_senha(u["senha_hash"], senha or ""):
+        return {k: v for k, v in u.items() if k != "senha_hash"}
     return None
@@ -1,2 +1,13 @@
 # utils/__init__.py
-from .helpers import *
+import importlib
+
+# Os nomes de utils.helpers continuam acessíveis como utils.<nome>, mas o módulo
+# só é importado quando algum deles é usado pela primeira vez.
+def __getattr__(nome):
+    if nome.startswith("__"):
+        raise AttributeError(nome)
+    helpers = importlib.import_module(".helpers", __name__)
+    try:
+        return getattr(helpers, nome)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}") from None
@@ -0,0 +1,133 @@
+# utils/componentes.py
+import math
+import streamlit as st
+from .helpers import COLUNAS_EXPORTACAO, exportar_em_blocos, blocos_em_bytes, exportar_pdf, get_dataframe_with_cols
+
+# Formatos exportados em blocos: rótulo -> (extensão, mime)
+FORMATOS_EXPORTACAO = {
+    "TXT":     ("txt", "text/plain"),
+    "CSV":     ("csv", "text/csv"),
+    "XLSX":    ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+def gerador_exportacao(linhas, entidade, formato):
+    """
+    Função sem argumentos que gera a exportação de `linhas` (DataFrame, lista de
+    dicionários ou função que devolva um deles) no `formato` ("pdf" ou uma extensão
+    de FORMATOS_EXPORTACAO) e devolve os bytes; é o `data` adiado dos botões de download.
+    """
+    colunas = COLUNAS_EXPORTACAO[entidade]
+
+    def blocos(extensao):
+        return exportar_em_blocos(linhas() if callable(linhas) else linhas, colunas, extensao)
+
+    if formato == "pdf":
+        return lambda: exportar_pdf(blocos_em_bytes(blocos("txt")).decode("utf-8"))
+    return lambda: blocos_em_bytes(blocos(formato))
+
+def botoes_exportacao(linhas, entidade, titulo):
+    """
+    Botões de download (TXT, PDF, CSV, XLSX e Parquet) de `linhas` (DataFrame, lista
+    de dicionários ou função que devolva um deles) com as colunas de COLUNAS_EXPORTACAO[entidade].
+    Nada é gerado (nem carregado, se `linhas` for função) até o clique; os formatos
+    tabulares são escritos em blocos.
+    """
+    col_txt, col_pdf, *cols_tabulares = st.columns(len(FORMATOS_EXPORTACAO) + 1)
+    with col_pdf:
+        st.download_button(
+            label=f"Exportar {titulo} (PDF)",
+            data=gerador_exportacao(linhas, entidade, "pdf"),
+            file_name=f"{entidade}.pdf",
+            mime="application/pdf"
+        )
+    for col, (rotulo, (extensao, mime)) in zip([col_txt] + cols_tabulares, FORMATOS_EXPORTACAO.items()):
+        with col:
+            st.download_button(
+                label=f"Exportar {titulo} ({rotulo})",
+                data=gerador_exportacao(linhas, entidade, extensao),
+                file_name=f"{entidade}.{extensao}",
+                mime=mime
+            )
+
+def tabela_paginada(carregar_pagina, colunas, chave, tamanho_pagina=50):
+    """
+    Tabela que busca e renderiza só a página visível.
+    `carregar_pagina(offset, limite)` deve devolver (linhas, total), com linhas em
+    DataFrame ou lista de dicionários. Retorna o total de linhas.
+    """
+    chave_pagina = f"{chave}_pagina"
+    pagina = st.session_state.get(chave_pagina, 1)
+    linhas, total = carregar_pagina((pagina - 1) * tamanho_pagina, tamanho_pagina)
+    paginas = max(1, math.ceil(total / tamanho_pagina))
+    if pagina > paginas:
+        # Os dados diminuíram desde a última página vista
+        pagina = paginas
+        linhas, total = carregar_pagina((pagina - 1) * tamanho_pagina, tamanho_pagina)
+    st.session_state[chave_pagina] = pagina
+
+    if isinstance(linhas, (list, tuple)):
+        st.dataframe(get_dataframe_with_cols(linhas, colunas))
+    else:
+        st.dataframe(linhas[colunas])
+    col_pagina, col_info = st.columns([1, 3])
+    with col_pagina:
+        st.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+    with col_info:
+        st.caption(f"Página {pagina} de {paginas} · {total} registro(s)")
+    return total
+
+def pagina_de_dataframe(df, ordem=None):
+    """
+    Adapta um DataFrame já em memória para tabela_paginada. Com `ordem` (posições das
+    linhas), pagina nessa ordem sem criar uma cópia ordenada do DataFrame.
+    """
+    if ordem is None:
+        return lambda offset, limite: (df.iloc[offset:offset + limite], len(df))
+    return lambda offset, limite: (df.iloc[ordem[offset:offset + limite]], len(df))
+
+def _andamento_envio(prefixo, total):
+    from servicos import fila_envios
+    estado = fila_envios.andamento(prefixo)
+    enviados = estado.get(fila_envios.ENVIADO, 0)
+    falhas = estado.get(fila_envios.FALHOU, 0)
+    st.progress(enviados / total if total else 1.0, text=f"Enviados à planilha: {enviados} de {total}")
+    if falhas:
+        st.warning(f"{falhas} registro(s) não foram aceitos pela planilha; reenvie pela fila de envios.")
+    elif enviados >= total:
+        st.success("Importação concluída: todos os registros foram gravados na planilha.")
+
+def painel_importacao(tipo, chave, escritorios=()):
+    """
+    Importação em massa de CSV/XLSX para a aba `tipo` ("Cliente" ou "Processo"):
+    valida, descarta duplicatas, põe as linhas na fila de envios e acompanha o envio.
+    """
+    arquivo = st.file_uploader("Arquivo CSV ou XLSX (primeira linha = nomes das colunas)",
+                               type=["csv", "xlsx"], key=f"{chave}_arquivo")
+    escritorio = ""
+    if escritorios:
+        escritorio = st.selectbox("Escritório (para linhas sem escritório)", list(escritorios),
+                                  key=f"{chave}_escritorio")
+    chave_resultado = f"{chave}_resultado"
+    if arquivo is not None and st.button("Importar", key=f"{chave}_importar"):
+        from servicos.importacao import importar
+        barra = st.progress(0.0, text="Lendo o arquivo...")
+        st.session_state[chave_resultado] = importar(
+            tipo, arquivo, arquivo.name, st.session_state.usuario, escritorio,
+            progresso=lambda fracao, texto: barra.progress(fracao, text=texto),
+        )
+
+    resultado = st.session_state.get(chave_resultado)
+    if resultado is None:
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Linhas lidas", resultado.lidas)
+    col2.metric("Importadas", resultado.importadas)
+    col3.metric("Duplicadas", resultado.duplicadas)
+    col4.metric("Inválidas", resultado.invalidas)
+    if resultado.erros:
+        with st.expander(f"Linhas com erro ({resultado.invalidas})"):
+            st.dataframe([{"linha": l, "motivo": m} for l, m in resultado.erros])
+    if resultado.importadas:
+        # Atualiza só este trecho a cada poucos segundos enquanto a fila drena
+        st.fragment(_andamento_envio, run_every=3)(resultado.prefixo, resultado.importadas)
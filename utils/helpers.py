@@ -1,8 +1,18 @@
 # utils/helpers.py
+import io
+import re
+import sys
+import csv
+import tempfile
+import hashlib
 import datetime
-import pandas as pd
-from fpdf import FPDF
-from docx import Document
+import threading
+from collections import OrderedDict
+from itertools import islice
+from servicos import metricas
+
+# numpy/pandas, fpdf e python-docx são importados só no primeiro uso:
+# carregar utils não deve custar o import dessas bibliotecas no cold start.
 
 def converter_data(data_str):
     if not data_str:
@@ -15,6 +25,82 @@ def converter_data(data_str):
     except:
         return datetime.date.today()
 
+def dia_do_prazo(prazo):
+    """
+    Ordinal (date.toordinal) do dia do prazo, ou None se vazio ou inválido.
+    Ao contrário de converter_data, não troca datas inválidas por hoje.
+    """
+    try:
+        return datetime.date.fromisoformat(str(prazo).replace("Z", "")[:10]).toordinal()
+    except ValueError:
+        return None
+
+# Ordem de exibição/ordenação dos status
+STATUS_PROCESSO = ["🔴 Atrasado", "🟡 Atenção", "🟢 Normal", "🔵 Movimentado", "⚫ Encerrado"]
+
+# Formatos que converter_data aceita e que dá para converter em bloco; o resto cai no caminho escalar
+_DATA_ISO_SIMPLES = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(T([01]\d|2[0-3]):[0-5]\d(:[0-5]\d(\.\d{1,6})?)?)?$"
+)
+
+def converter_datas(valores):
+    """
+    Versão vetorizada de converter_data: recebe uma sequência de textos e devolve
+    um array datetime64[D], usando a data de hoje para valores vazios ou inválidos.
+    Cada valor distinto é convertido uma única vez.
+    """
+    import numpy as np
+    import pandas as pd
+    codigos, unicos = pd.factorize(pd.Series(valores, dtype=object))
+    hoje = np.datetime64(datetime.date.today(), "D")
+    datas = np.full(len(unicos), hoje, dtype="datetime64[D]")
+
+    unicos = pd.Series(unicos, dtype=object)
+    textos = unicos.where(unicos.map(type) == str).astype("string")
+    textos = textos.str.replace("Z", "", regex=False)
+    simples = textos.str.match(_DATA_ISO_SIMPLES.pattern).fillna(False).to_numpy(dtype=bool)
+    convertidas = pd.to_datetime(textos[simples].str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    datas[simples] = np.where(
+        convertidas.isna(), hoje, convertidas.to_numpy(dtype="datetime64[D]")
+    )
+
+    # Textos em outros formatos ISO aceitos por fromisoformat (raros)
+    outros = (textos.notna() & (textos != "")).fillna(False).to_numpy(dtype=bool) & ~simples
+    for i in np.flatnonzero(outros):
+        datas[i] = np.datetime64(converter_data(unicos.iat[i]), "D")
+
+    # Código -1 = valor ausente (None/NaN)
+    return np.where(codigos < 0, hoje, datas[np.maximum(codigos, 0)]) if len(datas) else np.full(len(codigos), hoje)
+
+def _como_booleanos(valores, tamanho):
+    import numpy as np
+    import pandas as pd
+    if valores is None:
+        return np.zeros(tamanho, dtype=bool)
+    serie = pd.Series(valores, dtype=object)
+    # Ausente (None/NaN) conta como False, como em p.get(campo, False)
+    return (serie.notna() & serie.astype(bool)).to_numpy(dtype=bool)
+
+def calcular_status_processos(prazos, houve_movimentacao=None, encerrados=None):
+    """
+    Versão vetorizada de calcular_status_processo(converter_data(prazo), ...):
+    recebe colunas inteiras (listas, arrays ou Series) e devolve um
+    pd.Categorical com as categorias de STATUS_PROCESSO.
+    """
+    import numpy as np
+    import pandas as pd
+    datas = converter_datas(prazos)
+    dias = (datas - np.datetime64(datetime.date.today(), "D")).astype(np.int64)
+    movimentado = _como_booleanos(houve_movimentacao, len(datas))
+    encerrado = _como_booleanos(encerrados, len(datas))
+    # Códigos = posições em STATUS_PROCESSO; a ordem das condições segue a versão escalar
+    codigos = np.select(
+        [encerrado, movimentado, dias < 0, dias <= 10],
+        [4, 3, 0, 1],
+        default=2,
+    ).astype(np.int8)
+    return pd.Categorical.from_codes(codigos, categories=STATUS_PROCESSO, ordered=True)
+
 def calcular_status_processo(data_prazo, houve_movimentacao, encerrado=False):
     if encerrado:
         return "⚫ Encerrado"
@@ -28,22 +114,188 @@ def calcular_status_processo(data_prazo, houve_movimentacao, encerrado=False):
         return "🟡 Atenção"
     return "🟢 Normal"
 
-def exportar_pdf(texto, nome_arquivo="relatorio"):
+# Relatórios já gerados, pelo hash do conteúdo exportado (os mais recentes ficam)
+EXPORTACOES_EM_CACHE = 32
+_cache_exportacoes = OrderedDict()
+_lock_exportacoes = threading.Lock()
+
+def _exportar_com_cache(formato, texto, gerar):
+    chave = (formato, hashlib.sha256(texto.encode("utf-8")).hexdigest())
+    with _lock_exportacoes:
+        acerto = chave in _cache_exportacoes
+        if acerto:
+            _cache_exportacoes.move_to_end(chave)
+            conteudo = _cache_exportacoes[chave]
+    metricas.registrar_cache("exportacao", acerto)
+    if acerto:
+        return conteudo
+    with metricas.medir("exportacao", formato=formato):
+        conteudo = gerar(texto)
+    metricas.registrar_payload("exportacao", len(conteudo), formato=formato)
+    with _lock_exportacoes:
+        _cache_exportacoes[chave] = conteudo
+        while len(_cache_exportacoes) > EXPORTACOES_EM_CACHE:
+            _cache_exportacoes.popitem(last=False)
+    return conteudo
+
+def _gerar_pdf(texto):
+    from fpdf import FPDF
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
     pdf.multi_cell(0, 10, texto)
-    pdf.output(f"{nome_arquivo}.pdf")
-    return f"{nome_arquivo}.pdf"
+    saida = pdf.output(dest="S")
+    # fpdf 1.x devolve str latin-1; fpdf2 devolve bytearray
+    return saida.encode("latin-1") if isinstance(saida, str) else bytes(saida)
 
-def exportar_docx(texto, nome_arquivo="relatorio"):
+def _gerar_docx(texto):
+    from docx import Document
     doc = Document()
     doc.add_paragraph(texto)
-    doc.save(f"{nome_arquivo}.docx")
-    return f"{nome_arquivo}.docx"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def exportar_pdf(texto):
+    """
+    Gera o PDF em memória e devolve os bytes; textos idênticos reaproveitam o PDF já gerado.
+    """
+    return _exportar_com_cache("pdf", texto, _gerar_pdf)
+
+def exportar_docx(texto):
+    """
+    Gera o DOCX em memória e devolve os bytes; textos idênticos reaproveitam o arquivo já gerado.
+    """
+    return _exportar_com_cache("docx", texto, _gerar_docx)
+
+# Colunas exportadas de cada lista
+COLUNAS_EXPORTACAO = {
+    "processos":    ["numero", "cliente", "area", "prazo", "responsavel"],
+    "clientes":     ["nome", "email", "telefone"],
+    "funcionarios": ["nome", "email", "telefone"],
+    "escritorios":  ["nome", "endereco", "telefone"],
+}
+TAMANHO_BLOCO_EXPORTACAO = 10_000
+
+def _blocos_de_linhas(linhas, colunas, tamanho_bloco):
+    # Aceita DataFrame ou qualquer iterável de dicionários; gera listas de tuplas de texto.
+    # Se pandas ainda não foi importado, `linhas` não pode ser um DataFrame.
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(linhas, pd.DataFrame):
+        for inicio in range(0, len(linhas), tamanho_bloco):
+            bloco = linhas.iloc[inicio:inicio + tamanho_bloco].reindex(columns=colunas)
+            bloco = bloco.astype(object).where(bloco.notna(), "")
+            yield [tuple(str(v) for v in t) for t in bloco.itertuples(index=False, name=None)]
+        return
+    iterador = iter(linhas)
+    while True:
+        bloco = list(islice(iterador, tamanho_bloco))
+        if not bloco:
+            return
+        yield [tuple("" if l.get(c) is None else str(l.get(c)) for c in colunas) for l in bloco]
+
+def _txt_em_blocos(linhas, colunas, tamanho_bloco):
+    for bloco in _blocos_de_linhas(linhas, colunas, tamanho_bloco):
+        yield "".join(" | ".join(t) + "\n" for t in bloco).encode("utf-8")
+
+def _csv_em_blocos(linhas, colunas, tamanho_bloco):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para o Excel reconhecer UTF-8
+    buffer.write("\ufeff")
+    escritor.writerow(colunas)
+    for bloco in _blocos_de_linhas(linhas, colunas, tamanho_bloco):
+        escritor.writerows(bloco)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _xlsx_em_blocos(linhas, colunas, tamanho_bloco):
+    from openpyxl import Workbook
+    # Modo write_only grava as linhas direto em arquivo temporário; o zip do XLSX
+    # só existe no final, então os bytes saem depois da última linha
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet()
+    planilha.append(colunas)
+    for bloco in _blocos_de_linhas(linhas, colunas, tamanho_bloco):
+        for t in bloco:
+            planilha.append(t)
+    with tempfile.TemporaryFile() as arquivo:
+        livro.save(arquivo)
+        arquivo.seek(0)
+        while True:
+            dados = arquivo.read(1024 * 1024)
+            if not dados:
+                return
+            yield dados
+
+class _SaidaDrenavel(io.RawIOBase):
+    # Arquivo "de passagem": acumula o que o escritor grava até ser drenado
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def drenar(self):
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+def _parquet_em_blocos(linhas, colunas, tamanho_bloco):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    esquema = pa.schema([(c, pa.string()) for c in colunas])
+    saida = _SaidaDrenavel()
+    # Um row group por bloco: cada bloco vira bytes assim que é escrito
+    with pq.ParquetWriter(saida, esquema) as escritor:
+        for bloco in _blocos_de_linhas(linhas, colunas, tamanho_bloco):
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(coluna, type=pa.string()) for coluna in zip(*bloco)], schema=esquema
+            ))
+            dados = saida.drenar()
+            if dados:
+                yield dados
+    dados = saida.drenar()
+    if dados:
+        yield dados
+
+_EXPORTADORES_EM_BLOCOS = {
+    "txt": _txt_em_blocos,
+    "csv": _csv_em_blocos,
+    "xlsx": _xlsx_em_blocos,
+    "parquet": _parquet_em_blocos,
+}
+
+def exportar_em_blocos(linhas, colunas, formato, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """
+    Gera a exportação (txt, csv, xlsx ou parquet) de `linhas` (DataFrame ou iterável de
+    dicionários) como uma sequência de blocos de bytes, sem montar o arquivo inteiro na memória.
+    """
+    blocos = _EXPORTADORES_EM_BLOCOS[formato](linhas, colunas, tamanho_bloco)
+    return metricas.medir_blocos(blocos, "exportacao", formato=formato)
+
+def blocos_em_bytes(blocos):
+    """
+    Junta os blocos num único bytes, o formato que st.download_button aceita em `data`
+    (o Streamlit guarda o arquivo inteiro em memória de qualquer forma).
+    """
+    return b"".join(blocos)
 
 def get_dataframe_with_cols(data, columns):
-    data_list = data if isinstance(data, list) else [data]
+    import pandas as pd
+    data_list = list(data) if isinstance(data, (list, tuple)) else [data]
     df = pd.DataFrame(data_list)
     for c in columns:
         if c not in df.columns: